@@ -2,6 +2,7 @@ import argparse
 import json
 import random
 import string
+import sys
 from importlib.metadata import version as pkg_version
 from textwrap import dedent
 
@@ -11,6 +12,9 @@ from openai import Omit, omit
 DEFAULT_BASE_URL = None
 DEFAULT_SERVICE_TIER = omit
 
+# Input defaults
+DEFAULT_MAX_IMAGE_BYTES = 1_000_000
+
 # Model defaults
 DEFAULT_MODEL: str = "gpt-5.1"
 DEFAULT_FREQUENCY_PENALTY = omit
@@ -23,8 +27,29 @@ DEFAULT_TOP_P = omit
 # Output defaults
 DEFAULT_MAX_TOKENS = omit
 
+# Embedding defaults
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+DEFAULT_EMBEDDING_DIMENSIONS = omit
+DEFAULT_EMBEDDING_BATCH_TOKENS = 250_000
+DEFAULT_EMBEDDING_BATCH_ITEMS = 2048
+DEFAULT_EMBEDDING_CONCURRENCY = 4
+DEFAULT_EMBEDDING_TOP_K = 10
+
+EMBED_FLAG = "--embed"
+EMBED_SEARCH_FLAG = "--embed-search"
+
 
 def parse_args() -> argparse.Namespace:
+    argv = sys.argv[1:]
+
+    # The mode flags may only be preceded by profiling flags
+    mode_index = get_profile_args_end(argv)
+    mode_argv = argv[:mode_index] + argv[mode_index + 1 :]
+    if argv[mode_index : mode_index + 1] == [EMBED_FLAG]:
+        return parse_embed_args(mode_argv)
+    if argv[mode_index : mode_index + 1] == [EMBED_SEARCH_FLAG]:
+        return parse_embed_search_args(mode_argv)
+
     parser = argparse.ArgumentParser(
         description=dedent(
             """
@@ -34,6 +59,8 @@ def parse_args() -> argparse.Namespace:
 
             Single message mode: $ %(prog)s what is the capital of France?
 
+            Embeddings mode: $ %(prog)s --embed --help
+
             Make sure you set the `OPENAI_API_KEY` environment variable, or use the `--api-key` flag.
         """
         ),
@@ -44,6 +71,9 @@ def parse_args() -> argparse.Namespace:
     add_input_args(parser)
     add_model_args(parser)
     add_output_args(parser)
+    add_traffic_args(parser)
+    add_embed_mode_args(parser)
+    add_debug_args(parser)
 
     version = pkg_version("llm_cli")
     parser.add_argument(
@@ -54,18 +84,43 @@ def parse_args() -> argparse.Namespace:
         help="Show program's version number and exit.",
     )
 
-    args = parser.parse_args()
+    parser.set_defaults(command=None)
+
+    args = parser.parse_args(argv)
+
+    if args.embed or args.embed_search:
+        parser.error(
+            f"{EMBED_FLAG} and {EMBED_SEARCH_FLAG} must be the first argument, "
+            "or follow only profiling flags"
+        )
 
     args.message = get_message(args)
     args.response_format = get_response_format(args)
     args.headers = dict(item for items in args.headers for item in items)
 
+    check_traffic_args(args)
+    check_responses_api_args(args)
+
     return args
 
 
-def add_api_args(parser: argparse.ArgumentParser) -> None:
-    parser = parser.add_argument_group("API")
+def get_profile_args_end(argv: list[str]) -> int:
+    """Get the index of the first arg that is not a profiling arg."""
+    i = 0
+    while i < len(argv):
+        if argv[i] in ("--profile", "--profile-memory") or argv[i].startswith(
+            "--profile-output="
+        ):
+            i += 1
+        elif argv[i] == "--profile-output":
+            i += 2
+        else:
+            break
+
+    return min(i, len(argv))
 
+
+def add_connection_args(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "--api-key",
         "-k",
@@ -95,6 +150,12 @@ def add_api_args(parser: argparse.ArgumentParser) -> None:
         """,
     )
 
+
+def add_api_args(parser: argparse.ArgumentParser) -> None:
+    parser = parser.add_argument_group("API")
+
+    add_connection_args(parser)
+
     parser.add_argument(
         "--prompt-cache-key",
         default=get_default_prompt_cache_key(),
@@ -121,6 +182,15 @@ def add_api_args(parser: argparse.ArgumentParser) -> None:
         help="Specifies the processing type used for serving the request. Default: auto.",
     )
 
+    parser.add_argument(
+        "--responses-api",
+        action="store_true",
+        help="""
+            Use the Responses API instead of the Chat Completions API.
+            The conversation is stored server-side, so each chat turn only sends the new message.
+        """,
+    )
+
 
 def header_arg(value: str) -> tuple[str, str]:
     """Parse a header argument in the format 'header=value'."""
@@ -133,6 +203,22 @@ def header_arg(value: str) -> tuple[str, str]:
         ) from e
 
 
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"Must be positive, got {value}")
+
+    return number
+
+
+def positive_float(value: str) -> float:
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"Must be positive, got {value}")
+
+    return number
+
+
 def get_default_prompt_cache_key() -> str:
     """Generate a random 8-character string for the prompt cache key."""
     return "".join(random.choices(string.ascii_letters + string.digits, k=8))
@@ -158,6 +244,38 @@ def add_input_args(parser: argparse.ArgumentParser) -> None:
         "This will output the assistant's response and exit (no chat).",
     )
 
+    parser.add_argument(
+        "--attach",
+        "-a",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="""
+            Attach a file (image, PDF, or text) to the message. Can be specified multiple times.
+            In chat mode, the files are attached to the first message; to attach files to later
+            messages, add a line to the message of the form: /attach PATH [PATH ...]
+        """,
+    )
+
+    parser.add_argument(
+        "--max-image-bytes",
+        default=DEFAULT_MAX_IMAGE_BYTES,
+        type=positive_int,
+        help="""
+            Attached images larger than this are downscaled and recompressed to fit.
+            Requires Pillow. Default: %(default)s
+        """,
+    )
+
+    parser.add_argument(
+        "--upload-attachments",
+        action="store_true",
+        help="""
+            Upload attached PDFs and other non-text, non-image files with the Files API,
+            and reference them by file ID, instead of sending their contents inline.
+        """,
+    )
+
     parser.add_argument(
         "message",
         nargs="*",
@@ -282,6 +400,264 @@ def add_output_args(parser: argparse.ArgumentParser) -> None:
         help="Do not stream the response.",
     )
 
+    parser.add_argument(
+        "--no-markdown",
+        action="store_true",
+        help="""
+            Do not render the response as Markdown.
+            Rendering is also disabled when stdout is not a terminal, or when the output is JSON.
+        """,
+    )
+
+
+def add_traffic_args(parser: argparse.ArgumentParser) -> None:
+    parser = parser.add_argument_group("Traffic")
+
+    parser.add_argument(
+        "--record",
+        metavar="PATH",
+        help="""
+            Record the request kwargs, and the response or timestamped streamed chunks,
+            of each API request to this file. Gzip-compressed if the path ends with `.gz`.
+        """,
+    )
+
+    parser.add_argument(
+        "--replay",
+        metavar="PATH",
+        help="""
+            Serve the responses recorded with --record, in order, instead of calling the API.
+        """,
+    )
+
+    parser.add_argument(
+        "--replay-speed",
+        default=1.0,
+        type=float,
+        help="""
+            Speed multiplier for the timing of replayed chunks.
+            Use 0 to replay as fast as possible. Default: %(default)s
+        """,
+    )
+
+    parser.add_argument(
+        "--load",
+        metavar="PATH",
+        help="""
+            Re-issue the requests recorded with --record at --load-qps against the API,
+            then print latency histograms and exit.
+        """,
+    )
+
+    parser.add_argument(
+        "--load-qps",
+        default=1.0,
+        type=positive_float,
+        help="Target requests per second for --load. Default: %(default)s",
+    )
+
+    parser.add_argument(
+        "--load-requests",
+        type=positive_int,
+        help="""
+            Number of requests to send for --load, cycling through the recorded requests.
+            Defaults to the number of recorded requests.
+        """,
+    )
+
+
+def add_embed_mode_args(parser: argparse.ArgumentParser) -> None:
+    parser = parser.add_argument_group("Embeddings")
+
+    parser.add_argument(
+        EMBED_FLAG,
+        action="store_true",
+        help=f"""
+            Embed texts and write the vectors to a file.
+            Must be the first argument, other than profiling args.
+            See `%(prog)s {EMBED_FLAG} --help`.
+        """,
+    )
+
+    parser.add_argument(
+        EMBED_SEARCH_FLAG,
+        action="store_true",
+        help=f"""
+            Search vectors written by {EMBED_FLAG}.
+            Must be the first argument, other than profiling args.
+            See `%(prog)s {EMBED_SEARCH_FLAG} --help`.
+        """,
+    )
+
+
+def add_debug_args(parser: argparse.ArgumentParser) -> None:
+    parser = parser.add_argument_group("Debug")
+
+    add_profile_args(parser)
+
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="""
+            Print the request that would be sent, with its estimated token counts, cacheable prefix,
+            cost, and latency, then exit. Does not make any network requests.
+        """,
+    )
+
+
+def add_profile_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="""
+            Profile the CLI with cProfile, and print a summary of the slowest functions,
+            the timing of each phase (including imports), and the peak memory to stderr on exit.
+        """,
+    )
+
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="""
+            Also trace Python memory allocations with tracemalloc. Implies --profile.
+            Tracing slows down the CLI, which skews the timings.
+        """,
+    )
+
+    parser.add_argument(
+        "--profile-output",
+        metavar="PATH",
+        help="""
+            Write the raw profile data (pstats format) to this file. Implies --profile.
+            View with e.g. `snakeviz PATH` or `python -m pstats PATH`.
+        """,
+    )
+
+
+def parse_embed_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog=f"llm {EMBED_FLAG}",
+        description=dedent(
+            """
+            Embed texts in batches, and write the vectors to a float32 `.npy` file,
+            with their IDs in a `.ids.txt` sidecar file.
+
+            Each non-blank line of the input files (or stdin) is embedded as a separate text.
+
+            Search the vectors with: $ llm --embed-search --help
+        """
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+
+    parser.add_argument(
+        "files",
+        nargs="*",
+        metavar="FILE",
+        help="Files containing the texts to embed. Use - or omit to read from stdin.",
+    )
+
+    parser.add_argument(
+        "--output",
+        "-o",
+        required=True,
+        help="The path of the `.npy` file to write the vectors to.",
+    )
+
+    parser.add_argument(
+        "--whole-files",
+        action="store_true",
+        help="Embed each file as a single text, instead of each line.",
+    )
+
+    add_embedding_model_args(parser)
+
+    parser.add_argument(
+        "--batch-tokens",
+        default=DEFAULT_EMBEDDING_BATCH_TOKENS,
+        type=positive_int,
+        help="Maximum estimated number of tokens per request. Default: %(default)s",
+    )
+
+    parser.add_argument(
+        "--batch-items",
+        default=DEFAULT_EMBEDDING_BATCH_ITEMS,
+        type=positive_int,
+        help="Maximum number of texts per request. Default: %(default)s",
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        "-j",
+        default=DEFAULT_EMBEDDING_CONCURRENCY,
+        type=positive_int,
+        help="Number of requests to send concurrently. Default: %(default)s",
+    )
+
+    return parse_embed_common_args(parser, argv, command="embed")
+
+
+def parse_embed_search_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog=f"llm {EMBED_SEARCH_FLAG}",
+        description=f"Search vectors written by `llm {EMBED_FLAG}` for the texts most similar to the query.",
+    )
+
+    parser.add_argument(
+        "vectors",
+        help=f"The path of the `.npy` file written by `llm {EMBED_FLAG}`.",
+    )
+
+    parser.add_argument(
+        "query",
+        nargs="+",
+        help="The text to search for.",
+    )
+
+    parser.add_argument(
+        "--top-k",
+        "-n",
+        default=DEFAULT_EMBEDDING_TOP_K,
+        type=positive_int,
+        help="Number of results to show. Default: %(default)s",
+    )
+
+    add_embedding_model_args(parser)
+
+    return parse_embed_common_args(parser, argv, command="embed-search")
+
+
+def add_embedding_model_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--model",
+        "-m",
+        default=DEFAULT_EMBEDDING_MODEL,
+        help="The embedding model to use. Default: %(default)s",
+    )
+
+    parser.add_argument(
+        "--dimensions",
+        default=DEFAULT_EMBEDDING_DIMENSIONS,
+        type=int,
+        help="The number of dimensions of the vectors, if supported by the model.",
+    )
+
+
+def parse_embed_common_args(
+    parser: argparse.ArgumentParser,
+    argv: list[str],
+    command: str,
+) -> argparse.Namespace:
+    add_connection_args(parser.add_argument_group("API"))
+    add_profile_args(parser.add_argument_group("Debug"))
+    parser.set_defaults(command=command)
+
+    args = parser.parse_args(argv)
+
+    args.headers = dict(item for items in args.headers for item in items)
+
+    return args
+
 
 def get_message(args: argparse.Namespace) -> str | None:
     cli_message = " ".join(args.message)
@@ -315,6 +691,27 @@ def get_response_format(args: argparse.Namespace) -> dict[str, str] | Omit:
     return omit
 
 
+def check_traffic_args(args: argparse.Namespace) -> None:
+    if args.replay and args.list_models:
+        raise ValueError("Cannot specify both --replay and --list-models")
+
+
+def check_responses_api_args(args: argparse.Namespace) -> None:
+    if not args.responses_api:
+        return
+
+    if not isinstance(args.frequency_penalty, Omit) or not isinstance(
+        args.presence_penalty, Omit
+    ):
+        raise ValueError(
+            "Cannot specify --frequency-penalty or --presence-penalty with --responses-api"
+        )
+
+    # Recording and replay only support the Chat Completions API
+    if args.record or args.replay:
+        raise ValueError("Cannot specify --record or --replay with --responses-api")
+
+
 def print_settings(args: argparse.Namespace) -> None:
     print(f"model: {args.model}")
 
@@ -326,6 +723,9 @@ def print_settings(args: argparse.Namespace) -> None:
     if args.service_tier != DEFAULT_SERVICE_TIER:
         print(f"service-tier: {args.service_tier}")
 
+    if args.responses_api:
+        print("responses-api: true")
+
     # Model settings
 
     if args.frequency_penalty != DEFAULT_FREQUENCY_PENALTY:
@@ -0,0 +1,188 @@
+import base64
+import hashlib
+import mimetypes
+import os
+import shlex
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Optional
+
+from openai import OpenAI
+
+# Image types supported by the OpenAI API
+IMAGE_MIME_TYPES = {"image/gif", "image/jpeg", "image/png", "image/webp"}
+
+# Images larger than the budget are downscaled to at most this many pixels
+# per side, then recompressed
+MAX_IMAGE_DIMENSION = 2048
+IMAGE_QUALITIES = (85, 70, 55, 40)
+IMAGE_DOWNSCALE_FACTOR = 0.75
+MIN_IMAGE_DIMENSION = 64
+
+ATTACH_COMMAND = "/attach"
+
+ContentPart = dict[str, Any]
+
+
+def import_pillow():
+    try:
+        import PIL.Image
+    except ImportError as e:
+        raise ImportError(
+            "Shrinking images requires Pillow. Install it with: pip install 'llm-cli[images]'"
+        ) from e
+
+    return PIL.Image
+
+
+class Attachments:
+    """
+    Builds user message content parts from attached files.
+
+    Parts are cached by file hash, and hashes are cached by path, mtime, and
+    size, so a file attached again in a later turn is not re-read, re-encoded,
+    or re-uploaded. Since the parts are stored in the messages, re-sending the
+    messages on later turns does no extra work either.
+    """
+
+    def __init__(
+        self,
+        max_image_bytes: int,
+        client: Optional[OpenAI] = None,
+        upload: bool = False,
+    ):
+        self.max_image_bytes = max_image_bytes
+        self.client = client
+        self.upload = upload and client is not None
+
+        # Real path -> (mtime in ns, size, SHA-256 hash)
+        self._file_hashes: dict[str, tuple[int, int, str]] = {}
+        # (SHA-256 hash, path) -> content part, which may include the path
+        self._parts: dict[tuple[str, str], ContentPart] = {}
+
+    def build_user_message(self, text: str, paths: list[str]) -> dict[str, Any]:
+        if not paths:
+            return dict(role="user", content=text)
+
+        content = [dict(type="text", text=text)] if text else []
+        content.extend(self.get_content_part(path) for path in paths)
+
+        return dict(role="user", content=content)
+
+    def get_content_part(self, path: str) -> ContentPart:
+        real_path = os.path.realpath(path)
+        stat = os.stat(real_path)
+
+        data = None
+        cached = self._file_hashes.get(real_path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            file_hash = cached[2]
+        else:
+            data = Path(real_path).read_bytes()
+            file_hash = hashlib.sha256(data).hexdigest()
+            self._file_hashes[real_path] = (stat.st_mtime_ns, stat.st_size, file_hash)
+
+        key = (file_hash, path)
+        part = self._parts.get(key)
+        if part is None:
+            if data is None:
+                data = Path(real_path).read_bytes()
+
+            part = self.encode(path, data)
+            self._parts[key] = part
+
+        return part
+
+    def encode(self, path: str, data: bytes) -> ContentPart:
+        filename = os.path.basename(path)
+        mime_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+        if mime_type in IMAGE_MIME_TYPES:
+            data, mime_type = shrink_image(data, mime_type, self.max_image_bytes)
+            return dict(
+                type="image_url",
+                image_url=dict(url=to_data_url(data, mime_type)),
+            )
+
+        if mime_type != "application/pdf":
+            try:
+                text = data.decode()
+            except UnicodeDecodeError:
+                pass
+            else:
+                return dict(type="text", text=f"File: {path}\n```\n{text}\n```")
+
+        if self.upload:
+            uploaded_file = self.client.files.create(
+                file=(filename, data, mime_type),
+                purpose="user_data",
+            )
+            return dict(type="file", file=dict(file_id=uploaded_file.id))
+
+        return dict(
+            type="file",
+            file=dict(filename=filename, file_data=to_data_url(data, mime_type)),
+        )
+
+
+def shrink_image(data: bytes, mime_type: str, max_bytes: int) -> tuple[bytes, str]:
+    """
+    Downscale and recompress the image as JPEG until it fits in `max_bytes`.
+    Images that already fit are returned unchanged.
+    """
+
+    if len(data) <= max_bytes:
+        return data, mime_type
+
+    Image = import_pillow()
+
+    image = Image.open(BytesIO(data))
+    image.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION))
+    image = image.convert("RGB")
+
+    while True:
+        for quality in IMAGE_QUALITIES:
+            buffer = BytesIO()
+            image.save(buffer, format="JPEG", quality=quality, optimize=True)
+            if buffer.tell() <= max_bytes:
+                return buffer.getvalue(), "image/jpeg"
+
+        width, height = image.size
+        if min(width, height) * IMAGE_DOWNSCALE_FACTOR < MIN_IMAGE_DIMENSION:
+            return buffer.getvalue(), "image/jpeg"
+
+        image = image.resize(
+            (
+                round(width * IMAGE_DOWNSCALE_FACTOR),
+                round(height * IMAGE_DOWNSCALE_FACTOR),
+            )
+        )
+
+
+def to_data_url(data: bytes, mime_type: str) -> str:
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode()}"
+
+
+def parse_attach_commands(text: str) -> tuple[str, list[str]]:
+    """
+    Remove lines of the form "/attach PATH [PATH ...]" from the text,
+    and return the remaining text and the attached paths.
+    """
+
+    lines = []
+    paths = []
+    for line in text.splitlines():
+        if line.startswith(ATTACH_COMMAND + " "):
+            paths.extend(shlex.split(line[len(ATTACH_COMMAND) :]))
+        else:
+            lines.append(line)
+
+    return "\n".join(lines).strip(), paths
+
+
+def get_content_text(content: str | list[ContentPart]) -> str:
+    """Get the text of message content, ignoring any attachments."""
+    if isinstance(content, str):
+        return content
+
+    return "\n".join(part["text"] for part in content if part["type"] == "text")
@@ -12,7 +12,12 @@ from prompt_toolkit.history import InMemoryHistory
 from prompt_toolkit.key_binding import KeyBindings
 
 from llm_cli.args import print_settings
+from llm_cli.attachments import Attachments, get_content_text, parse_attach_commands
+from llm_cli.markdown import get_renderer
+from llm_cli.profiling import profile_span
+from llm_cli.responses import get_assistant_response_responses_api
 from llm_cli.spinner import optional_spinner
+from llm_cli.tokens import record_token_usage
 from llm_cli.utils import (
     error_is_streaming_not_supported,
     get_term_width,
@@ -20,13 +25,20 @@ from llm_cli.utils import (
     print_token_usage,
 )
 
-Message = dict[str, str]
+Message = dict[str, Any]
 
 
 def chat(args: argparse.Namespace, client: OpenAI) -> None:
     system_message = get_system_message(args)
     messages: list[Message] = [system_message] if system_message else []
 
+    attachments = get_attachments(args, client)
+    # Files given with --attach are attached to the first message.
+    # Prepare them up front, so a bad path fails before the chat starts
+    attach_paths = args.attach
+    for path in attach_paths:
+        attachments.get_content_part(path)
+
     print_settings(args)
     print()
 
@@ -38,7 +50,7 @@ def chat(args: argparse.Namespace, client: OpenAI) -> None:
         print_header(f"👤 User [{turn}]", bar_char="=")
         print()
         try:
-            user_message = get_user_message()
+            user_message = get_user_message(attachments, attach_paths)
         except UndoCommand:
             if len(messages) >= 2:
                 messages.pop()
@@ -49,6 +61,13 @@ def chat(args: argparse.Namespace, client: OpenAI) -> None:
                 print("[No messages to drop]")
             print()
             continue
+        except (OSError, ValueError, ImportError, OpenAIError) as e:
+            print(f"[Error attaching file: {e}]")
+            if attach_paths:
+                print("[Files from --attach dropped]")
+                attach_paths = []
+            print()
+            continue
         messages.append(user_message)
         print()
 
@@ -70,15 +89,35 @@ def chat(args: argparse.Namespace, client: OpenAI) -> None:
             print_last_user_message(messages)
         else:
             messages.append(assistant_response)
+            attach_paths = []
         print()
         print()
 
 
 def single_message(args: argparse.Namespace, client: OpenAI) -> None:
+    messages = get_messages(args, get_attachments(args, client))
+    get_assistant_response(args, client, messages, use_spinner=False)
+
+
+def get_messages(args: argparse.Namespace, attachments: Attachments) -> list[Message]:
     system_message = get_system_message(args)
     messages = [system_message] if system_message else []
-    messages.append(dict(role="user", content=args.message))
-    get_assistant_response(args, client, messages, use_spinner=False)
+
+    if args.message or args.attach:
+        messages.append(attachments.build_user_message(args.message or "", args.attach))
+
+    return messages
+
+
+def get_attachments(
+    args: argparse.Namespace,
+    client: Optional[OpenAI] = None,
+) -> Attachments:
+    return Attachments(
+        max_image_bytes=args.max_image_bytes,
+        client=client,
+        upload=args.upload_attachments,
+    )
 
 
 def get_system_message(args: argparse.Namespace) -> Optional[Message]:
@@ -95,13 +134,15 @@ def get_system_message(args: argparse.Namespace) -> Optional[Message]:
     return None
 
 
-def get_user_message() -> Message:
+def get_user_message(attachments: Attachments, attach_paths: list[str]) -> Message:
     session = get_prompt_session()
     content = session.prompt(
         bottom_toolbar=bottom_toolbar,
     ).strip()
 
-    return dict(role="user", content=content)
+    content, paths = parse_attach_commands(content)
+
+    return attachments.build_user_message(content, attach_paths + paths)
 
 
 @lru_cache(maxsize=1)
@@ -165,7 +206,7 @@ def print_last_user_message(messages: list[Message]) -> None:
     if message is None:
         return
 
-    message = message["content"].replace("\n", " ")
+    message = get_content_text(message["content"]).replace("\n", " ")
     message = shorten(message, width=50, placeholder=" ...")
 
     print(f'[Last message is now: "{message}"]')
@@ -177,20 +218,15 @@ def get_assistant_response(
     messages: list[Message],
     use_spinner: bool = True,
 ) -> Message:
-    request_kwargs = dict(
-        messages=messages,
-        model=args.model,
-        frequency_penalty=args.frequency_penalty,
-        max_completion_tokens=args.max_tokens,
-        presence_penalty=args.presence_penalty,
-        prompt_cache_key=args.prompt_cache_key,
-        prompt_cache_retention=args.prompt_cache_retention,
-        reasoning_effort=args.reasoning_effort,
-        response_format=args.response_format,
-        service_tier=args.service_tier,
-        temperature=args.temperature,
-        top_p=args.top_p,
-    )
+    if args.responses_api:
+        return get_assistant_response_responses_api(
+            args,
+            client,
+            messages,
+            use_spinner,
+        )
+
+    request_kwargs = build_request_kwargs(args, messages)
 
     if not args.no_stream:
         try:
@@ -221,41 +257,68 @@ def get_assistant_response(
     return dict(role="assistant", content=message)
 
 
+def build_request_kwargs(
+    args: argparse.Namespace,
+    messages: list[Message],
+) -> dict[str, Any]:
+    return dict(
+        messages=messages,
+        model=args.model,
+        frequency_penalty=args.frequency_penalty,
+        max_completion_tokens=args.max_tokens,
+        presence_penalty=args.presence_penalty,
+        prompt_cache_key=args.prompt_cache_key,
+        prompt_cache_retention=args.prompt_cache_retention,
+        reasoning_effort=args.reasoning_effort,
+        response_format=args.response_format,
+        service_tier=args.service_tier,
+        temperature=args.temperature,
+        top_p=args.top_p,
+    )
+
+
 def get_assistant_message_streaming(
     args: argparse.Namespace,
     client: OpenAI,
     request_kwargs: dict[str, Any],
     use_spinner: bool,
 ) -> str:
-    with optional_spinner(use_spinner):
+    with profile_span("create"), optional_spinner(use_spinner):
         response_stream = client.chat.completions.create(
             **request_kwargs,
             stream=True,
             stream_options=dict(include_usage=True),
         )
 
+    renderer = get_renderer(args)
     message_chunks = []
     print_buffer = ""
     token_usage = None
-    for chunk in response_stream:
-        # The last chunk should have no choices and should have the token usage
-        if not chunk.choices:
-            token_usage = chunk.usage
-            break
-
-        content = chunk.choices[0].delta.content
-        if not content:
-            continue
-
-        # Some models like to output a lot of whitespace at the end;
-        # use a buffer to avoid printing it
-        print_buffer += content
-
-        if not print_buffer.isspace():
-            print(print_buffer, end="", flush=True)
-            message_chunks.append(print_buffer)
-            print_buffer = ""
-    print()
+    with profile_span("stream"):
+        for chunk in response_stream:
+            # The last chunk should have no choices and should have the token usage
+            if not chunk.choices:
+                token_usage = chunk.usage
+                break
+
+            content = chunk.choices[0].delta.content
+            if not content:
+                continue
+
+            # Some models like to output a lot of whitespace at the end;
+            # use a buffer to avoid printing it
+            print_buffer += content
+
+            if not print_buffer.isspace():
+                with profile_span("output"):
+                    renderer.write(print_buffer)
+                message_chunks.append(print_buffer)
+                print_buffer = ""
+    renderer.finish()
+
+    # Replayed usage is for the recorded request, not this one
+    if token_usage and not args.replay:
+        record_token_usage(request_kwargs, token_usage)
 
     if args.show_tokens and token_usage:
         print()
@@ -272,12 +335,18 @@ def get_assistant_message_no_streaming(
     request_kwargs: dict[str, Any],
     use_spinner: bool,
 ) -> str:
-    with optional_spinner(use_spinner):
+    with profile_span("create"), optional_spinner(use_spinner):
         response = client.chat.completions.create(**request_kwargs)
 
     assistant_message = response.choices[0].message.content.strip()
 
-    print(assistant_message)
+    with profile_span("output"):
+        renderer = get_renderer(args)
+        renderer.write(assistant_message)
+        renderer.finish()
+
+    if response.usage and not args.replay:
+        record_token_usage(request_kwargs, response.usage)
 
     if args.show_tokens:
         print()
@@ -0,0 +1,69 @@
+import argparse
+
+from openai import OpenAI
+
+from llm_cli.chat import chat, single_message
+from llm_cli.dry_run import dry_run
+from llm_cli.embed import embed, embed_search
+from llm_cli.json_schema import print_json_schema_template
+from llm_cli.list_models import list_models
+from llm_cli.profiling import profile_span
+from llm_cli.traffic import ReplayClient, load_test, optional_recording
+
+
+def run(args: argparse.Namespace) -> None:
+    if args.command == "embed":
+        embed(args, create_client(args))
+        return
+
+    if args.command == "embed-search":
+        embed_search(args, create_client(args))
+        return
+
+    if args.json_schema_template:
+        print_json_schema_template()
+        return
+
+    if args.dry_run:
+        dry_run(args)
+        return
+
+    with profile_span("client"):
+        if args.replay:
+            client = ReplayClient(args.replay, args.replay_speed)
+        else:
+            client = create_client(args)
+
+    if args.load:
+        load_test(args, client)
+        return
+
+    with optional_recording(client, args.record) as client:
+        run_with_client(args, client)
+
+
+def create_client(args: argparse.Namespace) -> OpenAI:
+    return OpenAI(
+        api_key=args.api_key,
+        base_url=args.base_url,
+        default_headers=args.headers or None,
+    )
+
+
+def run_with_client(args: argparse.Namespace, client: OpenAI) -> None:
+    if args.list_models:
+        list_models(client)
+        return
+
+    if args.message:
+        try:
+            single_message(args, client)
+        except KeyboardInterrupt:
+            print()
+            print("[Stopped]")
+        return
+
+    try:
+        chat(args, client)
+    except KeyboardInterrupt:
+        print("[Exit]")
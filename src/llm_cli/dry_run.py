@@ -0,0 +1,168 @@
+import argparse
+import json
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from openai import Omit
+
+from llm_cli.chat import build_request_kwargs, get_attachments, get_messages
+from llm_cli.responses import build_responses_request_kwargs
+from llm_cli.tokens import (
+    TOKENS_PER_REPLY,
+    estimate_message_tokens,
+    get_calibration_ratio,
+)
+
+# OpenAI caches prompts of at least this many tokens, in increments of
+# PROMPT_CACHE_INCREMENT tokens
+PROMPT_CACHE_MIN_TOKENS = 1024
+PROMPT_CACHE_INCREMENT = 128
+
+# Number of output tokens to assume if --max-tokens is not given
+DEFAULT_OUTPUT_TOKENS = 500
+
+
+@dataclass(frozen=True)
+class ModelProfile:
+    """Rough pricing (USD per 1M tokens) and performance of a model."""
+
+    context_window: int
+    input_price: float
+    cached_input_price: float
+    output_price: float
+    first_token_latency: float
+    input_tokens_per_second: float
+    output_tokens_per_second: float
+
+
+# Keyed by model name prefix; the longest matching prefix is used
+MODEL_PROFILES: dict[str, ModelProfile] = {
+    "gpt-5": ModelProfile(400_000, 1.25, 0.125, 10.00, 1.0, 20_000, 60),
+    "gpt-5-mini": ModelProfile(400_000, 0.25, 0.025, 2.00, 0.8, 30_000, 90),
+    "gpt-5-nano": ModelProfile(400_000, 0.05, 0.005, 0.40, 0.6, 40_000, 140),
+    "gpt-4.1": ModelProfile(1_047_576, 2.00, 0.50, 8.00, 0.5, 20_000, 80),
+    "gpt-4.1-mini": ModelProfile(1_047_576, 0.40, 0.10, 1.60, 0.4, 30_000, 100),
+    "gpt-4.1-nano": ModelProfile(1_047_576, 0.10, 0.025, 0.40, 0.3, 40_000, 150),
+    "gpt-4o": ModelProfile(128_000, 2.50, 1.25, 10.00, 0.5, 20_000, 80),
+    "gpt-4o-mini": ModelProfile(128_000, 0.15, 0.075, 0.60, 0.4, 30_000, 100),
+    "o3": ModelProfile(200_000, 2.00, 0.50, 8.00, 2.0, 15_000, 50),
+    "o4-mini": ModelProfile(200_000, 1.10, 0.275, 4.40, 1.5, 20_000, 80),
+}
+
+
+def get_model_profile(model: str) -> Optional[ModelProfile]:
+    prefixes = [p for p in MODEL_PROFILES if model.startswith(p)]
+    return MODEL_PROFILES[max(prefixes, key=len)] if prefixes else None
+
+
+def dry_run(args: argparse.Namespace) -> None:
+    """
+    Print the request that would be sent, and estimate its token count,
+    cost, and latency, without making any network requests.
+    """
+
+    messages = get_messages(args, get_attachments(args))
+    if args.responses_api:
+        request_kwargs = build_responses_request_kwargs(args, messages)
+        if not args.no_stream:
+            request_kwargs.update(stream=True)
+    else:
+        request_kwargs = build_request_kwargs(args, messages)
+        if not args.no_stream:
+            request_kwargs.update(stream=True, stream_options=dict(include_usage=True))
+
+    print_request_kwargs(request_kwargs)
+    print()
+
+    ratio = get_calibration_ratio(args.model)
+    message_tokens = [round(ratio * estimate_message_tokens(m)) for m in messages]
+    input_tokens = round(ratio * TOKENS_PER_REPLY) + sum(message_tokens)
+
+    print(f"Input tokens (estimated; calibration ratio={ratio:.2f}):")
+    for i, (message, tokens) in enumerate(zip(messages, message_tokens)):
+        print(f"  [{i}] {message['role']}: {tokens}")
+    print(f"  total: {input_tokens}")
+    print()
+
+    cacheable_tokens = get_cacheable_prefix_tokens(messages, message_tokens)
+    print(
+        f"Cacheable prefix (prompt-cache-key={args.prompt_cache_key}): "
+        f"{cacheable_tokens} tokens"
+    )
+
+    output_tokens = (
+        DEFAULT_OUTPUT_TOKENS if isinstance(args.max_tokens, Omit) else args.max_tokens
+    )
+
+    profile = get_model_profile(args.model)
+    if profile is None:
+        print(f"[No cost/latency profile for model {args.model!r}]")
+        return
+
+    total_tokens = input_tokens + output_tokens
+    fits = "fits" if total_tokens <= profile.context_window else "DOES NOT FIT"
+    print(f"Context window: {total_tokens} / {profile.context_window} tokens ({fits})")
+    print()
+
+    cold_cost = get_cost(profile, input_tokens, 0, output_tokens)
+    warm_cost = get_cost(profile, input_tokens, cacheable_tokens, output_tokens)
+    print(f"Projected cost (assuming {output_tokens} output tokens):")
+    print(f"  uncached: ${cold_cost:.4f}")
+    print(f"  cached:   ${warm_cost:.4f}")
+    print()
+
+    first_token_latency = (
+        profile.first_token_latency + input_tokens / profile.input_tokens_per_second
+    )
+    total_latency = (
+        first_token_latency + output_tokens / profile.output_tokens_per_second
+    )
+    print("Projected latency:")
+    print(f"  first token: {first_token_latency:.1f}s")
+    print(f"  total:       {total_latency:.1f}s")
+
+
+def print_request_kwargs(request_kwargs: dict[str, Any]) -> None:
+    request_kwargs = {
+        key: value
+        for key, value in request_kwargs.items()
+        if not isinstance(value, Omit) and key not in ("messages", "input")
+    }
+
+    print("Request:")
+    print(json.dumps(request_kwargs, indent=2))
+
+
+def get_cacheable_prefix_tokens(
+    messages: list[dict[str, Any]],
+    message_tokens: list[int],
+) -> int:
+    """
+    Estimate how many input tokens could be served from the prompt cache,
+    i.e. the stable prefix of messages before the last user message,
+    rounded down to a whole number of cache increments.
+    """
+
+    user_indexes = [i for i, m in enumerate(messages) if m["role"] == "user"]
+    prefix_end = user_indexes[-1] if user_indexes else len(messages)
+    prefix_tokens = sum(message_tokens[:prefix_end])
+
+    if prefix_tokens < PROMPT_CACHE_MIN_TOKENS:
+        return 0
+
+    increments = (prefix_tokens - PROMPT_CACHE_MIN_TOKENS) // PROMPT_CACHE_INCREMENT
+    return PROMPT_CACHE_MIN_TOKENS + increments * PROMPT_CACHE_INCREMENT
+
+
+def get_cost(
+    profile: ModelProfile,
+    input_tokens: int,
+    cached_input_tokens: int,
+    output_tokens: int,
+) -> float:
+    uncached_input_tokens = input_tokens - cached_input_tokens
+    return (
+        uncached_input_tokens * profile.input_price
+        + cached_input_tokens * profile.cached_input_price
+        + output_tokens * profile.output_price
+    ) / 1_000_000
@@ -0,0 +1,215 @@
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator
+
+from openai import OpenAI
+
+from llm_cli.tokens import estimate_tokens
+
+# Number of vectors to load into memory at a time when searching
+SEARCH_BLOCK_SIZE = 65_536
+
+
+def import_numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError(
+            "`llm --embed` requires numpy. Install it with: pip install 'llm-cli[embed]'"
+        ) from e
+
+    return numpy
+
+
+def embed(args: argparse.Namespace, client: OpenAI) -> None:
+    """
+    Embed texts from files or stdin in concurrent batches, writing the vectors
+    to a memory-mapped float32 `.npy` file, and their IDs to a sidecar file.
+    """
+
+    np = import_numpy()
+
+    ids, texts = read_texts(args.files, args.whole_files)
+    if not texts:
+        raise ValueError("No texts to embed")
+
+    batches = list(make_batches(texts, args.batch_tokens, args.batch_items))
+    print(
+        f"[Embedding {len(texts)} texts in {len(batches)} batches]",
+        file=sys.stderr,
+    )
+
+    vectors = None
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = {
+            executor.submit(embed_batch, client, args, texts[batch]): batch
+            for batch in batches
+        }
+
+        try:
+            for future in as_completed(futures):
+                batch = futures[future]
+                embeddings = np.asarray(future.result(), dtype=np.float32)
+
+                if vectors is None:
+                    vectors = np.lib.format.open_memmap(
+                        args.output,
+                        mode="w+",
+                        dtype=np.float32,
+                        shape=(len(texts), embeddings.shape[1]),
+                    )
+
+                vectors[batch] = embeddings
+        except BaseException:
+            # Don't send (and pay for) the remaining batches,
+            # and don't leave a partially written output file
+            executor.shutdown(cancel_futures=True)
+            if vectors is not None:
+                vectors = None
+                Path(args.output).unlink(missing_ok=True)
+            raise
+
+    vectors.flush()
+
+    with open(get_ids_path(args.output), "w") as f:
+        for id_ in ids:
+            f.write(id_ + "\n")
+
+    print(
+        f"[Wrote {vectors.shape[0]}x{vectors.shape[1]} vectors to {args.output}]",
+        file=sys.stderr,
+    )
+
+
+def read_texts(paths: list[str], whole_files: bool) -> tuple[list[str], list[str]]:
+    """
+    Read the texts to embed, and their IDs, from the files or stdin ("-").
+
+    Each non-blank line is a text with ID "path:line", unless `whole_files` is
+    set, in which case each file is a single text with ID "path".
+    """
+
+    ids = []
+    texts = []
+    for path in paths or ["-"]:
+        if path == "-":
+            content = sys.stdin.read()
+        else:
+            with open(path) as f:
+                content = f.read()
+
+        if whole_files:
+            if content.strip():
+                ids.append(path)
+                texts.append(content)
+            continue
+
+        for line_number, line in enumerate(content.splitlines(), start=1):
+            if line.strip():
+                ids.append(f"{path}:{line_number}")
+                texts.append(line)
+
+    return ids, texts
+
+
+def make_batches(
+    texts: list[str],
+    max_tokens: int,
+    max_items: int,
+) -> Iterator[slice]:
+    """
+    Greedily pack consecutive texts into the largest batches that stay within
+    the estimated token limit and the item limit.
+    """
+
+    start = 0
+    batch_tokens = 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+
+        batch_full = i - start >= max_items or batch_tokens + tokens > max_tokens
+        if batch_full and i > start:
+            yield slice(start, i)
+            start = i
+            batch_tokens = 0
+
+        batch_tokens += tokens
+
+    yield slice(start, len(texts))
+
+
+def embed_batch(
+    client: OpenAI,
+    args: argparse.Namespace,
+    texts: list[str],
+) -> list[list[float]]:
+    response = client.embeddings.create(
+        input=texts,
+        model=args.model,
+        dimensions=args.dimensions,
+    )
+
+    return [e.embedding for e in sorted(response.data, key=lambda e: e.index)]
+
+
+def get_ids_path(vectors_path: str) -> Path:
+    return Path(vectors_path).with_suffix(".ids.txt")
+
+
+def embed_search(args: argparse.Namespace, client: OpenAI) -> None:
+    """
+    Print the IDs of the top-k vectors most similar to the query,
+    by cosine similarity, loading the vectors one block at a time.
+    """
+
+    np = import_numpy()
+
+    query = np.asarray(
+        embed_batch(client, args, [" ".join(args.query)])[0],
+        dtype=np.float32,
+    )
+    query /= np.linalg.norm(query) or 1
+
+    vectors = np.load(args.vectors, mmap_mode="r")
+    k = min(args.top_k, len(vectors))
+
+    top_scores = np.empty(0, dtype=np.float32)
+    top_indices = np.empty(0, dtype=np.int64)
+    for start in range(0, len(vectors), SEARCH_BLOCK_SIZE):
+        block = np.asarray(vectors[start : start + SEARCH_BLOCK_SIZE])
+
+        norms = np.linalg.norm(block, axis=1)
+        norms[norms == 0] = 1
+        scores = (block @ query) / norms
+
+        scores = np.concatenate([top_scores, scores])
+        indices = np.concatenate([top_indices, np.arange(start, start + len(block))])
+
+        if len(scores) > k:
+            keep = np.argpartition(scores, -k)[-k:]
+            scores, indices = scores[keep], indices[keep]
+
+        top_scores, top_indices = scores, indices
+
+    order = np.argsort(-top_scores)
+    top_scores, top_indices = top_scores[order], top_indices[order]
+
+    ids = read_ids(get_ids_path(args.vectors), set(top_indices.tolist()))
+    for score, index in zip(top_scores, top_indices):
+        print(f"{score:.4f}\t{ids.get(index, index)}")
+
+
+def read_ids(path: Path, indices: set[int]) -> dict[int, str]:
+    """Read only the IDs at the given line indices from the sidecar file."""
+    ids = {}
+    try:
+        with open(path) as f:
+            for index, line in enumerate(f):
+                if index in indices:
+                    ids[index] = line.rstrip("\n")
+    except FileNotFoundError:
+        pass
+
+    return ids
@@ -1,40 +1,26 @@
-from openai import OpenAI
+import sys
 
-from llm_cli.args import parse_args
-from llm_cli.chat import chat, single_message
-from llm_cli.json_schema import print_json_schema_template
-from llm_cli.list_models import list_models
+from llm_cli.profiling import optional_profiler, parse_profile_args, profile_span
 
 
 def main() -> None:
-    args = parse_args()
-
-    if args.json_schema_template:
-        print_json_schema_template()
-        return
-
-    client = OpenAI(
-        api_key=args.api_key,
-        base_url=args.base_url,
-        default_headers=args.headers or None,
-    )
-
-    if args.list_models:
-        list_models(client)
-        return
-
-    if args.message:
-        try:
-            single_message(args, client)
-        except KeyboardInterrupt:
-            print()
-            print("[Stopped]")
-        return
-
-    try:
-        chat(args, client)
-    except KeyboardInterrupt:
-        print("[Exit]")
+    # The profiling args are parsed first, and the rest of the CLI is imported
+    # lazily, so that import time and argument parsing are profiled too
+    profile_args = parse_profile_args(sys.argv[1:])
+
+    with optional_profiler(
+        profile_args.profile,
+        profile_args.profile_output,
+        profile_args.profile_memory,
+    ):
+        with profile_span("import"):
+            from llm_cli.args import parse_args
+            from llm_cli.cli import run
+
+        with profile_span("parse_args"):
+            args = parse_args()
+
+        run(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,329 @@
+import argparse
+import re
+import shutil
+import sys
+from math import ceil
+from typing import IO, Optional
+
+from openai import Omit
+from prompt_toolkit.utils import get_cwidth
+
+from llm_cli.utils import ANSI_FORMAT_RESET, bold, get_term_width
+
+ANSI_FORMAT_DIM = "\033[2m"
+ANSI_FORMAT_ITALIC = "\033[3m"
+ANSI_FORMAT_UNDERLINE = "\033[4m"
+ANSI_FORMAT_CYAN = "\033[36m"
+
+ANSI_ESCAPE_PATTERN = re.compile(r"\033\[[0-9;]*[A-Za-z]")
+
+FENCE_PATTERN = re.compile(r"^\s*(`{3,}|~{3,})\s*([\w+#.-]*)")
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*)")
+LIST_ITEM_PATTERN = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(.*)")
+BLOCKQUOTE_PATTERN = re.compile(r"^\s*>\s?(.*)")
+RULE_PATTERN = re.compile(r"^\s*(\*{3,}|-{3,}|_{3,})\s*$")
+TABLE_ROW_PATTERN = re.compile(r"^\s*\|")
+TABLE_SEPARATOR_PATTERN = re.compile(r"^[\s|:-]+$")
+
+CODE_SPAN_PATTERN = re.compile(r"(`+)(.+?)\1")
+BOLD_PATTERN = re.compile(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1")
+ITALIC_PATTERN = re.compile(r"(?<![\w*])([*_])(?=\S)(.+?)(?<=\S)\1(?![\w*])")
+LINK_PATTERN = re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)")
+
+MAX_RULE_WIDTH = 50
+
+# Maximum number of lines of an unterminated multi-line string or comment
+# to keep as context when highlighting the lines after it
+MAX_CODE_CONTEXT_LINES = 20
+
+
+def get_renderer(args: argparse.Namespace, out: IO[str] = sys.stdout):
+    """
+    Return a Markdown renderer if stdout is a terminal, or a plain renderer
+    if it is not, if --no-markdown was given, or if the output is JSON.
+    """
+
+    use_markdown = (
+        not args.no_markdown and isinstance(args.response_format, Omit) and out.isatty()
+    )
+
+    return MarkdownRenderer(out) if use_markdown else PlainRenderer(out)
+
+
+class PlainRenderer:
+    def __init__(self, out: IO[str] = sys.stdout):
+        self.out = out
+
+    def write(self, text: str) -> None:
+        print(text, end="", flush=True, file=self.out)
+
+    def finish(self) -> None:
+        print(file=self.out)
+
+
+class MarkdownRenderer:
+    """
+    Renders streamed Markdown to the terminal incrementally.
+
+    Text is printed raw as it arrives. Each time a line is completed, the raw
+    tail is erased and the line is rendered and committed, so only the open
+    tail is ever redrawn, and total rendering cost stays linear in the length
+    of the response. Tables are committed once all their rows have arrived,
+    so their columns can be aligned.
+
+    If the tail is too tall to erase, it is left raw.
+    """
+
+    def __init__(self, out: IO[str] = sys.stdout):
+        self.out = out
+
+        # Uncommitted text, which is displayed raw after the committed output
+        self.tail = ""
+        # Index in the tail of the start of the next line to parse
+        self.scan_pos = 0
+
+        self.in_table = False
+        self.fence: Optional[str] = None
+        self.code_highlighter: Optional[CodeHighlighter] = None
+
+    def write(self, text: str) -> None:
+        old_tail = self.tail
+        self.tail += text
+
+        rendered = []
+        commit_pos = 0
+        while (line_end := self.tail.find("\n", self.scan_pos)) != -1:
+            line = self.tail[self.scan_pos : line_end]
+
+            if self.in_table and not TABLE_ROW_PATTERN.match(line):
+                rendered.append(render_table(self.tail[commit_pos : self.scan_pos]))
+                commit_pos = self.scan_pos
+                self.in_table = False
+
+            if self.fence is None and TABLE_ROW_PATTERN.match(line):
+                self.in_table = True
+            else:
+                rendered.append(self.render_line(line) + "\n")
+                commit_pos = line_end + 1
+
+            self.scan_pos = line_end + 1
+
+        if rendered and self.erase(old_tail):
+            self.out.write("".join(rendered) + self.tail[commit_pos:])
+        else:
+            self.out.write(text)
+
+        self.tail = self.tail[commit_pos:]
+        self.scan_pos -= commit_pos
+        self.out.flush()
+
+    def finish(self) -> None:
+        self.write("\n")
+
+        if self.in_table:
+            if self.erase(self.tail):
+                self.out.write(render_table(self.tail))
+            self.tail = ""
+            self.in_table = False
+
+        self.out.flush()
+
+    def erase(self, text: str) -> bool:
+        """
+        Erase the text, which was the last output, from the terminal.
+        Returns False if the text is too tall to erase.
+        """
+
+        if not text:
+            return True
+
+        term_size = shutil.get_terminal_size()
+        lines = text.split("\n")
+        rows_up = sum(get_rows(line, term_size.columns) for line in lines[:-1])
+        rows_up += get_rows(lines[-1], term_size.columns) - 1
+
+        if rows_up >= term_size.lines - 1:
+            return False
+
+        self.out.write("\r" + (f"\033[{rows_up}A" if rows_up else "") + "\033[J")
+        return True
+
+    def render_line(self, line: str) -> str:
+        if self.fence is not None:
+            if line.strip().startswith(self.fence) and not line.strip(
+                self.fence[0] + " \t"
+            ):
+                self.fence = None
+                self.code_highlighter = None
+                return dim(line)
+
+            return self.code_highlighter.highlight(line)
+
+        if match := FENCE_PATTERN.match(line):
+            self.fence = match.group(1)
+            self.code_highlighter = CodeHighlighter(match.group(2))
+            return dim(line)
+
+        if match := HEADING_PATTERN.match(line):
+            level, text = match.groups()
+            heading = bold(render_inline(text))
+            return underline(heading) if len(level) == 1 else heading
+
+        if RULE_PATTERN.match(line):
+            return dim("─" * min(get_term_width(), MAX_RULE_WIDTH))
+
+        if match := LIST_ITEM_PATTERN.match(line):
+            indent, marker, text = match.groups()
+            marker = "•" if marker in "-*+" else marker
+            return f"{indent}{marker} {render_inline(text)}"
+
+        if match := BLOCKQUOTE_PATTERN.match(line):
+            return dim("│ ") + render_inline(match.group(1))
+
+        return render_inline(line)
+
+
+def get_rows(line: str, term_width: int) -> int:
+    """Get the number of terminal rows the line wraps to."""
+    return max(1, ceil(get_cwidth(line.expandtabs()) / term_width))
+
+
+def render_inline(text: str) -> str:
+    # Split out code spans, so they are not formatted
+    parts = CODE_SPAN_PATTERN.split(text)
+
+    rendered = []
+    for i in range(0, len(parts), 3):
+        part = parts[i]
+        part = LINK_PATTERN.sub(
+            lambda m: underline(m.group(1)) + dim(f" ({m.group(2)})"), part
+        )
+        part = BOLD_PATTERN.sub(lambda m: bold(m.group(2)), part)
+        part = ITALIC_PATTERN.sub(lambda m: italic(m.group(2)), part)
+        rendered.append(part)
+
+        if i + 2 < len(parts):
+            rendered.append(cyan(parts[i + 2]))
+
+    return "".join(rendered)
+
+
+def render_table(text: str) -> str:
+    rows = []
+    for line in text.splitlines():
+        line = line.strip()
+        if TABLE_SEPARATOR_PATTERN.match(line):
+            rows.append(None)
+            continue
+
+        cells = line.strip("|").split("|")
+        rows.append([render_inline(cell.strip()) for cell in cells])
+
+    column_count = max((len(row) for row in rows if row), default=0)
+    widths = [0] * column_count
+    for row in filter(None, rows):
+        for i, cell in enumerate(row):
+            widths[i] = max(widths[i], get_display_width(cell))
+
+    lines = []
+    for row in rows:
+        if row is None:
+            lines.append(dim("─┼─".join("─" * width for width in widths)))
+            continue
+
+        row = row + [""] * (column_count - len(row))
+        cells = [
+            cell + " " * (width - get_display_width(cell))
+            for cell, width in zip(row, widths)
+        ]
+        lines.append(dim(" │ ").join(cells))
+
+    return "\n".join(lines) + "\n"
+
+
+def get_display_width(text: str) -> int:
+    return get_cwidth(ANSI_ESCAPE_PATTERN.sub("", text))
+
+
+def get_code_lexer(language: str):
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+
+    try:
+        return get_lexer_by_name(language or "text", stripnl=False)
+    except ClassNotFound:
+        return None
+
+
+class CodeHighlighter:
+    """
+    Highlights the lines of a code block one at a time.
+
+    Each line is lexed on its own, unless the previous line ended inside a
+    multi-line string or comment; then it is lexed after the lines that
+    opened that token, so it is highlighted as part of it. Lines entirely
+    inside the token do not change the lexer state, so they are not kept,
+    and the cost per line stays constant.
+    """
+
+    def __init__(self, language: str):
+        self.lexer = get_code_lexer(language)
+        # The lines that opened the multi-line token the last line ended in,
+        # and the type of that token
+        self.context: list[str] = []
+        self.context_token_type = None
+
+    def highlight(self, line: str) -> str:
+        if self.lexer is None:
+            return line
+
+        from pygments import format as format_tokens
+        from pygments.formatters import TerminalFormatter
+        from pygments.token import Comment, String
+
+        source = "".join(context_line + "\n" for context_line in self.context)
+        source += line + "\n"
+
+        line_tokens = []
+        end_token_type = None
+        line_index = 0
+        for token_type, value in self.lexer.get_tokens(source):
+            for i, part in enumerate(value.split("\n")):
+                if i > 0:
+                    if line_index == len(self.context):
+                        end_token_type = token_type
+                    line_index += 1
+
+                if line_index == len(self.context) and part:
+                    line_tokens.append((token_type, part))
+
+        inside_token = self.context and all(
+            token_type == end_token_type == self.context_token_type
+            for token_type, _ in line_tokens
+        )
+
+        if end_token_type not in String and end_token_type not in Comment:
+            self.context.clear()
+        elif not inside_token:
+            self.context.append(line)
+            del self.context[:-MAX_CODE_CONTEXT_LINES]
+
+        self.context_token_type = end_token_type
+
+        return format_tokens(line_tokens, TerminalFormatter()).rstrip("\n")
+
+
+def dim(text: str) -> str:
+    return ANSI_FORMAT_DIM + text + ANSI_FORMAT_RESET
+
+
+def italic(text: str) -> str:
+    return ANSI_FORMAT_ITALIC + text + ANSI_FORMAT_RESET
+
+
+def underline(text: str) -> str:
+    return ANSI_FORMAT_UNDERLINE + text + ANSI_FORMAT_RESET
+
+
+def cyan(text: str) -> str:
+    return ANSI_FORMAT_CYAN + text + ANSI_FORMAT_RESET
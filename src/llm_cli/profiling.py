@@ -0,0 +1,176 @@
+import argparse
+import cProfile
+import pstats
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import ContextManager, Iterator, Optional
+
+PROFILE_TOP_N = 25
+
+# Span durations, keyed by span name; None when profiling is disabled
+_span_durations: Optional[dict[str, list[float]]] = None
+
+
+def parse_profile_args(argv: list[str]) -> argparse.Namespace:
+    """
+    Parse only the profiling args, so profiling can start before the rest of
+    the CLI is imported. See `llm_cli.args.add_profile_args` for their help.
+    """
+
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--profile-memory", action="store_true")
+    parser.add_argument("--profile-output")
+
+    args, _ = parser.parse_known_args(argv)
+
+    return args
+
+
+def optional_profiler(
+    profile: bool,
+    output_path: Optional[str] = None,
+    trace_memory: bool = False,
+) -> ContextManager:
+    if profile or output_path or trace_memory:
+        return profiler(output_path, trace_memory)
+
+    return NoopProfiler()
+
+
+@contextmanager
+def profiler(
+    output_path: Optional[str] = None,
+    trace_memory: bool = False,
+) -> Iterator[None]:
+    """
+    Profile the enclosed code with cProfile.
+
+    On exit, a summary of the spans, peak memory, and top functions is printed
+    to stderr. If `output_path` is given, the raw pstats data is also written
+    to that file, e.g. for use with `snakeviz` or `flameprof`.
+
+    If `trace_memory` is set, Python allocations are also traced with
+    tracemalloc, at the cost of skewing the timings.
+    """
+
+    global _span_durations
+    _span_durations = defaultdict(list)
+
+    if trace_memory:
+        tracemalloc.start()
+
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+
+        peak_traced_memory = None
+        if trace_memory:
+            _, peak_traced_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        span_durations = _span_durations
+        _span_durations = None
+
+        print_profile_summary(prof, span_durations, peak_traced_memory)
+
+        if output_path:
+            prof.dump_stats(output_path)
+            print(f"[Profile written to {output_path}]", file=sys.stderr)
+
+
+class NoopProfiler:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+def profile_span(name: str) -> ContextManager:
+    """Time the enclosed code under the given span name, if profiling."""
+    if _span_durations is None:
+        return _NOOP_SPAN
+
+    return _Span(_span_durations[name])
+
+
+class _Span:
+    __slots__ = ("durations", "start")
+
+    def __init__(self, durations: list[float]):
+        self.durations = durations
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.durations.append(time.perf_counter() - self.start)
+
+
+_NOOP_SPAN = NoopProfiler()
+
+
+def print_profile_summary(
+    prof: cProfile.Profile,
+    span_durations: dict[str, list[float]],
+    peak_traced_memory: Optional[int],
+) -> None:
+    out = sys.stderr
+
+    print(file=out)
+    print("[Profile]", file=out)
+
+    if span_durations:
+        print(file=out)
+        print("Spans:", file=out)
+        name_width = max(len(name) for name in span_durations)
+        for name, durations in span_durations.items():
+            total_ms = 1000 * sum(durations)
+            mean_ms = total_ms / len(durations)
+            print(
+                f"  {name:<{name_width}}  "
+                f"calls={len(durations)}; "
+                f"total={total_ms:.1f}ms; "
+                f"mean={mean_ms:.3f}ms",
+                file=out,
+            )
+
+    print(file=out)
+
+    peak_rss = get_peak_rss()
+    if peak_rss is not None:
+        print(f"Peak RSS: {peak_rss / 2**20:.2f} MiB", file=out)
+
+    if peak_traced_memory is not None:
+        print(
+            f"Peak traced memory: {peak_traced_memory / 2**20:.2f} MiB "
+            f"(timings are skewed by tracemalloc overhead)",
+            file=out,
+        )
+
+    print(file=out)
+
+    stats = pstats.Stats(prof, stream=out)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_TOP_N)
+
+
+def get_peak_rss() -> Optional[int]:
+    """Get the peak resident set size of the process in bytes, if available."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Reported in bytes on macOS, and in KiB elsewhere
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
@@ -0,0 +1,219 @@
+import argparse
+from typing import Any
+
+from openai import BadRequestError, Omit, OpenAI, OpenAIError, omit
+from openai.types.responses import Response
+
+from llm_cli.markdown import get_renderer
+from llm_cli.profiling import profile_span
+from llm_cli.spinner import optional_spinner
+from llm_cli.utils import error_is_streaming_not_supported, print_token_usage
+
+
+def get_assistant_response_responses_api(
+    args: argparse.Namespace,
+    client: OpenAI,
+    messages: list[dict[str, Any]],
+    use_spinner: bool = True,
+) -> dict[str, Any]:
+    """
+    Get the assistant response using the Responses API.
+
+    The conversation state is stored server-side: only the messages after the
+    last assistant message are sent, along with that message's response ID.
+    Dropping messages from the end of `messages` rewinds the conversation to
+    an earlier response.
+    """
+
+    request_kwargs = build_responses_request_kwargs(args, messages)
+
+    if not args.no_stream:
+        try:
+            message, response_id = get_assistant_message_responses_streaming(
+                args,
+                client,
+                request_kwargs,
+                use_spinner,
+            )
+        except BadRequestError as e:
+            if error_is_streaming_not_supported(e):
+                print(
+                    f"[Streaming not supported. Error message: {e.body.get('message')}]"
+                )
+                print()
+                args.no_stream = True
+            else:
+                raise
+
+    if args.no_stream:
+        message, response_id = get_assistant_message_responses_no_streaming(
+            args,
+            client,
+            request_kwargs,
+            use_spinner,
+        )
+
+    return dict(role="assistant", content=message, response_id=response_id)
+
+
+def build_responses_request_kwargs(
+    args: argparse.Namespace,
+    messages: list[dict[str, Any]],
+) -> dict[str, Any]:
+    instructions = omit
+    if messages and messages[0]["role"] == "system":
+        instructions = messages[0]["content"]
+        messages = messages[1:]
+
+    previous_response_id = omit
+    for i in reversed(range(len(messages))):
+        if messages[i].get("response_id"):
+            previous_response_id = messages[i]["response_id"]
+            messages = messages[i + 1 :]
+            break
+
+    return dict(
+        input=[
+            dict(role=m["role"], content=get_responses_content(m["content"]))
+            for m in messages
+        ],
+        model=args.model,
+        instructions=instructions,
+        max_output_tokens=args.max_tokens,
+        previous_response_id=previous_response_id,
+        prompt_cache_key=args.prompt_cache_key,
+        prompt_cache_retention=args.prompt_cache_retention,
+        reasoning=(
+            omit
+            if isinstance(args.reasoning_effort, Omit)
+            else dict(effort=args.reasoning_effort)
+        ),
+        service_tier=args.service_tier,
+        store=True,
+        temperature=args.temperature,
+        text=get_text_config(args.response_format),
+        top_p=args.top_p,
+    )
+
+
+def get_responses_content(
+    content: str | list[dict[str, Any]],
+) -> str | list[dict[str, Any]]:
+    """Convert Chat Completions message content to Responses input content."""
+    if isinstance(content, str):
+        return content
+
+    return [get_responses_content_part(part) for part in content]
+
+
+def get_responses_content_part(part: dict[str, Any]) -> dict[str, Any]:
+    if part["type"] == "text":
+        return dict(type="input_text", text=part["text"])
+
+    if part["type"] == "image_url":
+        return dict(
+            type="input_image", image_url=part["image_url"]["url"], detail="auto"
+        )
+
+    if part["type"] == "file":
+        return dict(type="input_file", **part["file"])
+
+    raise ValueError(f"Unsupported content part type: {part['type']}")
+
+
+def get_text_config(response_format: dict[str, Any] | Omit) -> dict[str, Any] | Omit:
+    """Convert a Chat Completions response format to a Responses text config."""
+    if isinstance(response_format, Omit):
+        return omit
+
+    if response_format["type"] == "json_schema":
+        return dict(format=dict(type="json_schema", **response_format["json_schema"]))
+
+    return dict(format=dict(type=response_format["type"]))
+
+
+def get_assistant_message_responses_streaming(
+    args: argparse.Namespace,
+    client: OpenAI,
+    request_kwargs: dict[str, Any],
+    use_spinner: bool,
+) -> tuple[str, str]:
+    with profile_span("create"), optional_spinner(use_spinner):
+        response_stream = client.responses.create(**request_kwargs, stream=True)
+
+    renderer = get_renderer(args)
+    message_chunks = []
+    print_buffer = ""
+    response = None
+    with profile_span("stream"):
+        for event in response_stream:
+            if event.type in ("response.completed", "response.incomplete"):
+                response = event.response
+                break
+
+            if event.type == "response.failed":
+                raise OpenAIError(event.response.error.message)
+
+            if event.type == "error":
+                raise OpenAIError(event.message)
+
+            if event.type != "response.output_text.delta" or not event.delta:
+                continue
+
+            # Some models like to output a lot of whitespace at the end;
+            # use a buffer to avoid printing it
+            print_buffer += event.delta
+
+            if not print_buffer.isspace():
+                with profile_span("output"):
+                    renderer.write(print_buffer)
+                message_chunks.append(print_buffer)
+                print_buffer = ""
+    renderer.finish()
+
+    if response is None:
+        raise OpenAIError("Response stream ended before the response completed")
+
+    print_incomplete_reason(response)
+
+    if args.show_tokens and response.usage:
+        print()
+        print_token_usage(response.usage)
+
+    assistant_message = "".join(message_chunks)
+
+    return assistant_message, response.id
+
+
+def get_assistant_message_responses_no_streaming(
+    args: argparse.Namespace,
+    client: OpenAI,
+    request_kwargs: dict[str, Any],
+    use_spinner: bool,
+) -> tuple[str, str]:
+    with profile_span("create"), optional_spinner(use_spinner):
+        response = client.responses.create(**request_kwargs)
+
+    assistant_message = response.output_text.strip()
+
+    with profile_span("output"):
+        renderer = get_renderer(args)
+        renderer.write(assistant_message)
+        renderer.finish()
+
+    print_incomplete_reason(response)
+
+    if args.show_tokens and response.usage:
+        print()
+        print_token_usage(response.usage)
+
+    return assistant_message, response.id
+
+
+def print_incomplete_reason(response: Response) -> None:
+    """Note when the response was cut short, e.g. by --max-tokens."""
+    if response.status != "incomplete":
+        return
+
+    reason = response.incomplete_details and response.incomplete_details.reason
+    print(f"[Incomplete: {reason or 'unknown reason'}]")
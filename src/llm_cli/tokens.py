@@ -0,0 +1,152 @@
+import json
+import os
+import re
+import tempfile
+from math import ceil
+from pathlib import Path
+from typing import Any
+
+from openai import Omit
+
+# Approximates the pre-tokenization of OpenAI's BPE tokenizers:
+# ASCII words (with an optional leading space), up to 3 digits, single
+# non-ASCII characters, punctuation runs, and whitespace runs.
+_TOKEN_PIECE_PATTERN = re.compile(
+    r" ?[A-Za-z]+|\d{1,3}|[^\x00-\x7f]| ?[^\sA-Za-z\d\x80-\U0010ffff]+|\s+"
+)
+
+# Average number of characters per token within a long ASCII word
+CHARS_PER_WORD_TOKEN = 6
+
+# Per-message formatting overhead, plus overhead to prime the assistant reply
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+# Approximate number of tokens per attached image, at high detail
+TOKENS_PER_IMAGE = 765
+
+# Weight given to each new sample when updating the calibration ratio
+CALIBRATION_SMOOTHING = 0.2
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in the text, without a network connection."""
+    tokens = 0
+    for match in _TOKEN_PIECE_PATTERN.finditer(text):
+        piece = match.group()
+        if piece[-1].isascii() and piece[-1].isalpha():
+            tokens += ceil(len(piece.lstrip()) / CHARS_PER_WORD_TOKEN)
+        elif piece.isdigit():
+            tokens += 1
+        elif piece.isspace():
+            tokens += 1 if "\n" in piece or len(piece) > 1 else 0
+        elif not piece.isascii():
+            tokens += len(piece.encode()) // 2 or 1
+        else:
+            tokens += ceil(len(piece.lstrip()) / 2)
+
+    return tokens
+
+
+def estimate_message_tokens(message: dict[str, Any]) -> int:
+    """
+    Estimate the number of tokens in the message.
+    Attached files other than images and text are not counted.
+    """
+
+    content = message["content"]
+    if isinstance(content, str):
+        return TOKENS_PER_MESSAGE + estimate_tokens(content)
+
+    tokens = TOKENS_PER_MESSAGE
+    for part in content:
+        if part["type"] == "text":
+            tokens += estimate_tokens(part["text"])
+        elif part["type"] == "image_url":
+            tokens += TOKENS_PER_IMAGE
+
+    return tokens
+
+
+def estimate_messages_tokens(messages: list[dict[str, Any]]) -> int:
+    return TOKENS_PER_REPLY + sum(estimate_message_tokens(m) for m in messages)
+
+
+def get_calibration_path() -> Path:
+    cache_dir = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_dir) / "llm-cli" / "token-calibration.json"
+
+
+def load_calibration() -> dict[str, dict[str, float]]:
+    try:
+        with open(get_calibration_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_calibration_ratio(model: str) -> float:
+    """
+    Return the ratio of actual to estimated input tokens for the model,
+    as learned from past responses. Defaults to 1.0.
+    """
+    return load_calibration().get(model, {}).get("ratio", 1.0)
+
+
+def record_token_usage(request_kwargs: dict[str, Any], token_usage) -> None:
+    """
+    Update the model's calibration ratio with the actual token usage
+    of the Chat Completions request.
+    """
+
+    model = request_kwargs["model"]
+    messages = request_kwargs["messages"]
+
+    # Attachments and response format schemas are not estimated,
+    # so they would skew the calibration
+    if any(not isinstance(m["content"], str) for m in messages):
+        return
+    if not isinstance(request_kwargs["response_format"], Omit):
+        return
+
+    estimated_tokens = estimate_messages_tokens(messages)
+    if not estimated_tokens or not token_usage.prompt_tokens:
+        return
+
+    ratio = token_usage.prompt_tokens / estimated_tokens
+
+    calibration = load_calibration()
+    model_calibration = calibration.setdefault(model, dict(ratio=ratio, samples=0))
+    model_calibration["ratio"] += CALIBRATION_SMOOTHING * (
+        ratio - model_calibration["ratio"]
+    )
+    model_calibration["samples"] += 1
+
+    save_calibration(calibration)
+
+
+def save_calibration(calibration: dict[str, dict[str, float]]) -> None:
+    """
+    Write the calibration to a temp file, then atomically replace the old file,
+    so concurrent or interrupted writes cannot leave a truncated file.
+    """
+
+    path = get_calibration_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w",
+            dir=path.parent,
+            prefix=path.name,
+            suffix=".tmp",
+            delete=False,
+        ) as f:
+            json.dump(calibration, f, indent=2)
+
+        try:
+            os.replace(f.name, path)
+        except OSError:
+            os.unlink(f.name)
+            raise
+    except OSError:
+        pass
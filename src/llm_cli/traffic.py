@@ -0,0 +1,371 @@
+import argparse
+import gzip
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from math import ceil
+from types import SimpleNamespace
+from typing import IO, Any, Iterator, Optional
+
+import openai
+from openai import APIStatusError, Omit, OpenAI, OpenAIError
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 60, float("inf"))
+
+HISTOGRAM_WIDTH = 40
+
+
+def open_recording(path: str, mode: str) -> IO[str]:
+    """Open a recording file, gzip-compressed if the path ends with `.gz`."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t")
+
+    return open(path, mode)
+
+
+def write_record(file: IO[str], record: dict[str, Any]) -> None:
+    file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def get_error_data(error: OpenAIError) -> dict[str, Any]:
+    data = dict(
+        type=type(error).__name__, message=getattr(error, "message", str(error))
+    )
+    if isinstance(error, APIStatusError):
+        data.update(
+            status_code=error.status_code,
+            request_id=error.request_id,
+            body=error.body,
+        )
+
+    return data
+
+
+def make_error(data: dict[str, Any]) -> OpenAIError:
+    """Re-create the error recorded with `get_error_data`."""
+    if "status_code" not in data:
+        return OpenAIError(data["message"])
+
+    error_class = getattr(openai, data["type"], None)
+    if not (isinstance(error_class, type) and issubclass(error_class, APIStatusError)):
+        error_class = APIStatusError
+
+    # The SDK only reads these attributes of the HTTP response
+    response = SimpleNamespace(
+        request=None,
+        status_code=data["status_code"],
+        headers={"x-request-id": data["request_id"]} if data["request_id"] else {},
+    )
+    return error_class(data["message"], response=response, body=data["body"])
+
+
+@dataclass
+class Exchange:
+    """
+    A recorded request, and the response or streamed chunks it returned,
+    or the error it raised.
+    """
+
+    kwargs: dict[str, Any]
+    response: Optional[dict[str, Any]] = None
+    chunks: list[tuple[float, dict[str, Any]]] = field(default_factory=list)
+    error: Optional[dict[str, Any]] = None
+    # Time of the response or error, relative to the request
+    t: float = 0
+
+    @property
+    def stream(self) -> bool:
+        return bool(self.kwargs.get("stream"))
+
+
+def load_exchanges(path: str) -> list[Exchange]:
+    exchanges = []
+    with open_recording(path, "r") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["type"] == "request":
+                exchanges.append(Exchange(kwargs=record["kwargs"]))
+            elif record["type"] == "chunk":
+                exchanges[-1].chunks.append((record["t"], record["data"]))
+            elif record["type"] == "response":
+                exchanges[-1].response = record["data"]
+                exchanges[-1].t = record["t"]
+            elif record["type"] == "error":
+                exchanges[-1].error = record["data"]
+                exchanges[-1].t = record["t"]
+
+    return exchanges
+
+
+@contextmanager
+def optional_recording(client: OpenAI, path: Optional[str]) -> Iterator[OpenAI]:
+    if not path:
+        yield client
+        return
+
+    with open_recording(path, "w") as f:
+        yield RecordingClient(client, f)
+
+
+class RecordingClient:
+    """
+    Wraps an OpenAI client, recording the kwargs of each chat completion
+    request, and the response or timestamped chunks it returns, to a file.
+    """
+
+    def __init__(self, client: OpenAI, file: IO[str]):
+        self.client = client
+        self.file = file
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def create(self, **kwargs):
+        start = time.monotonic()
+        write_record(
+            self.file,
+            dict(
+                type="request",
+                time=time.time(),
+                kwargs={k: v for k, v in kwargs.items() if not isinstance(v, Omit)},
+            ),
+        )
+
+        try:
+            response = self.client.chat.completions.create(**kwargs)
+        except OpenAIError as e:
+            self._record_error(e, start)
+            raise
+
+        if not kwargs.get("stream"):
+            write_record(
+                self.file,
+                dict(
+                    type="response",
+                    t=time.monotonic() - start,
+                    data=response.model_dump(mode="json", exclude_unset=True),
+                ),
+            )
+            self.file.flush()
+            return response
+
+        return self._record_stream(response, start)
+
+    def _record_stream(self, response_stream, start: float):
+        try:
+            for chunk in response_stream:
+                write_record(
+                    self.file,
+                    dict(
+                        type="chunk",
+                        t=time.monotonic() - start,
+                        data=chunk.model_dump(mode="json", exclude_unset=True),
+                    ),
+                )
+                yield chunk
+        except OpenAIError as e:
+            self._record_error(e, start)
+            raise
+        finally:
+            self.file.flush()
+
+    def _record_error(self, error: OpenAIError, start: float) -> None:
+        write_record(
+            self.file,
+            dict(type="error", t=time.monotonic() - start, data=get_error_data(error)),
+        )
+        self.file.flush()
+
+
+class ReplayClient:
+    """
+    Serves recorded responses, in order, in place of an OpenAI client.
+    Recorded errors are raised again.
+
+    Responses, streamed chunks, and errors are returned with their original
+    timing, scaled by `1 / speed`. A speed of 0 returns them as fast as possible.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.exchanges = load_exchanges(path)
+        self.speed = speed
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        if not self.exchanges:
+            raise OpenAIError("No more recorded responses to replay")
+
+        exchange = self.exchanges.pop(0)
+        stream = bool(kwargs.get("stream"))
+        if stream != exchange.stream:
+            raise OpenAIError(
+                f"Recorded request has stream={exchange.stream}, "
+                f"but replayed request has stream={stream}"
+            )
+
+        start = time.monotonic()
+
+        if stream and exchange.chunks:
+            self._wait_until(start, exchange.chunks[0][0])
+            return self._replay_stream(exchange, start)
+
+        self._wait_until(start, exchange.t)
+
+        if exchange.error is not None:
+            raise make_error(exchange.error)
+
+        if not stream:
+            if exchange.response is None:
+                raise OpenAIError("Recorded request has no response")
+
+            return ChatCompletion.model_validate(exchange.response)
+
+        return self._replay_stream(exchange, start)
+
+    def _replay_stream(self, exchange: Exchange, start: float):
+        for t, data in exchange.chunks:
+            self._wait_until(start, t)
+            yield ChatCompletionChunk.model_validate(data)
+
+        if exchange.error is not None:
+            self._wait_until(start, exchange.t)
+            raise make_error(exchange.error)
+
+    def _wait_until(self, start: float, t: float) -> None:
+        if self.speed <= 0:
+            return
+
+        delay = start + t / self.speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+@dataclass
+class LoadResult:
+    latency: Optional[float] = None
+    first_token_latency: Optional[float] = None
+    error: Optional[Exception] = None
+
+
+def load_test(args: argparse.Namespace, client: OpenAI) -> None:
+    """
+    Re-issue the recorded requests against the client at the target QPS,
+    then print latency statistics and histograms.
+
+    This is an open-loop test: requests are sent on schedule whether or not
+    earlier requests have completed, and latency is measured from each
+    request's scheduled start time.
+    """
+
+    exchanges = load_exchanges(args.load)
+    if not exchanges:
+        raise ValueError(f"No recorded requests in {args.load}")
+
+    request_count = args.load_requests or len(exchanges)
+    results = [LoadResult() for _ in range(request_count)]
+    threads = []
+
+    print(f"[Sending {request_count} requests at {args.load_qps} QPS]")
+
+    start = time.monotonic()
+    for i in range(request_count):
+        scheduled = start + i / args.load_qps
+        delay = scheduled - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        thread = threading.Thread(
+            target=send_load_request,
+            args=(client, exchanges[i % len(exchanges)].kwargs, scheduled, results[i]),
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+
+    for thread in threads:
+        thread.join()
+
+    duration = time.monotonic() - start
+    print_load_results(results, duration)
+
+
+def send_load_request(
+    client: OpenAI,
+    kwargs: dict[str, Any],
+    scheduled: float,
+    result: LoadResult,
+) -> None:
+    try:
+        response = client.chat.completions.create(**kwargs)
+
+        if kwargs.get("stream"):
+            for chunk in response:
+                # The first chunk usually only has the role, so wait for content
+                if (
+                    result.first_token_latency is None
+                    and chunk.choices
+                    and chunk.choices[0].delta.content
+                ):
+                    result.first_token_latency = time.monotonic() - scheduled
+    except Exception as e:
+        result.error = e
+    else:
+        result.latency = time.monotonic() - scheduled
+
+
+def print_load_results(results: list[LoadResult], duration: float) -> None:
+    errors = [r.error for r in results if r.error]
+    achieved_qps = len(results) / duration
+
+    print(
+        f"[Requests: {len(results)}; "
+        f"errors: {len(errors)}; "
+        f"duration: {duration:.1f}s; "
+        f"achieved QPS: {achieved_qps:.2f}]"
+    )
+
+    for error in errors[:5]:
+        print(f"  error: {error}")
+
+    print_latency_histogram(
+        "Latency", [r.latency for r in results if r.latency is not None]
+    )
+    print_latency_histogram(
+        "First token latency",
+        [r.first_token_latency for r in results if r.first_token_latency is not None],
+    )
+
+
+def print_latency_histogram(title: str, latencies: list[float]) -> None:
+    if not latencies:
+        return
+
+    latencies = sorted(latencies)
+
+    def percentile(p: float) -> float:
+        return latencies[max(ceil(p / 100 * len(latencies)) - 1, 0)]
+
+    print()
+    print(
+        f"{title}: "
+        f"p50={percentile(50):.3f}s; "
+        f"p90={percentile(90):.3f}s; "
+        f"p99={percentile(99):.3f}s; "
+        f"max={latencies[-1]:.3f}s"
+    )
+
+    counts = [0] * len(LATENCY_BUCKETS)
+    for latency in latencies:
+        counts[bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    max_count = max(counts)
+    for bound, count in zip(LATENCY_BUCKETS, counts):
+        label = f"<= {bound}s" if bound != float("inf") else f"> {LATENCY_BUCKETS[-2]}s"
+        bar = "#" * round(HISTOGRAM_WIDTH * count / max_count)
+        print(f"  {label:>9} | {bar} {count}")
@@ -36,17 +36,23 @@ def print_header(header: str, bar_char: str = "=", max_width: int = 50) -> None:
 
 
 def print_token_usage(token_usage) -> None:
-    input_tokens = token_usage.prompt_tokens
+    # Chat Completions API and Responses API usages have different field names
+    if hasattr(token_usage, "input_tokens"):
+        input_tokens = token_usage.input_tokens
+        input_tokens_details = token_usage.input_tokens_details
+        output_tokens = token_usage.output_tokens
+    else:
+        input_tokens = token_usage.prompt_tokens
+        input_tokens_details = token_usage.prompt_tokens_details
+        output_tokens = token_usage.completion_tokens
 
     try:
-        cached_input_tokens = token_usage.prompt_tokens_details.cached_tokens
+        cached_input_tokens = input_tokens_details.cached_tokens
     except AttributeError:
         cached_input_tokens = 0
 
     cached_input_tokens_percent = round(100 * cached_input_tokens / input_tokens)
 
-    output_tokens = token_usage.completion_tokens
-
     total_tokens = input_tokens + output_tokens
 
     print(
@@ -0,0 +1,195 @@
+import os
+from io import BytesIO
+from types import SimpleNamespace
+
+import pytest
+
+from llm_cli.attachments import (
+    Attachments,
+    get_content_text,
+    parse_attach_commands,
+    shrink_image,
+)
+
+
+@pytest.fixture
+def encode_calls(monkeypatch):
+    calls = []
+    encode = Attachments.encode
+
+    def counting_encode(self, path, data):
+        calls.append(path)
+        return encode(self, path, data)
+
+    monkeypatch.setattr(Attachments, "encode", counting_encode)
+    return calls
+
+
+class TestAttachments:
+    def test_text_file_part(self, tmp_path):
+        path = tmp_path / "notes.txt"
+        path.write_text("hello")
+
+        part = Attachments(max_image_bytes=1000).get_content_part(str(path))
+
+        assert part == dict(type="text", text=f"File: {path}\n```\nhello\n```")
+
+    def test_binary_file_part_is_inlined(self, tmp_path):
+        path = tmp_path / "doc.pdf"
+        path.write_bytes(b"%PDF-1.4")
+
+        part = Attachments(max_image_bytes=1000).get_content_part(str(path))
+
+        assert part == dict(
+            type="file",
+            file=dict(
+                filename="doc.pdf", file_data="data:application/pdf;base64,JVBERi0xLjQ="
+            ),
+        )
+
+    def test_same_file_is_encoded_once(self, tmp_path, encode_calls):
+        path = tmp_path / "notes.txt"
+        path.write_text("hello")
+        attachments = Attachments(max_image_bytes=1000)
+
+        first = attachments.get_content_part(str(path))
+        second = attachments.get_content_part(str(path))
+
+        assert second is first
+        assert len(encode_calls) == 1
+
+    def test_touched_file_with_same_content_reuses_part(self, tmp_path, encode_calls):
+        path = tmp_path / "notes.txt"
+        path.write_text("hello")
+        attachments = Attachments(max_image_bytes=1000)
+
+        first = attachments.get_content_part(str(path))
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        second = attachments.get_content_part(str(path))
+
+        assert second is first
+        assert len(encode_calls) == 1
+
+    def test_changed_file_gets_new_part(self, tmp_path, encode_calls):
+        path = tmp_path / "notes.txt"
+        path.write_text("hello")
+        attachments = Attachments(max_image_bytes=1000)
+
+        first = attachments.get_content_part(str(path))
+        path.write_text("goodbye")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        second = attachments.get_content_part(str(path))
+
+        assert "goodbye" in second["text"]
+        assert second is not first
+        assert len(encode_calls) == 2
+
+    def test_same_content_with_different_names_gets_separate_parts(self, tmp_path):
+        (tmp_path / "a.txt").write_text("hello")
+        (tmp_path / "b.txt").write_text("hello")
+        attachments = Attachments(max_image_bytes=1000)
+
+        a = attachments.get_content_part(str(tmp_path / "a.txt"))
+        b = attachments.get_content_part(str(tmp_path / "b.txt"))
+
+        assert "a.txt" in a["text"]
+        assert "b.txt" in b["text"]
+
+    def test_same_content_with_same_name_in_different_dirs(self, tmp_path):
+        for directory in ("a", "b"):
+            (tmp_path / directory).mkdir()
+            (tmp_path / directory / "notes.txt").write_text("hello")
+        attachments = Attachments(max_image_bytes=1000)
+
+        a = attachments.get_content_part(str(tmp_path / "a" / "notes.txt"))
+        b = attachments.get_content_part(str(tmp_path / "b" / "notes.txt"))
+
+        assert a["text"].startswith(f"File: {tmp_path / 'a' / 'notes.txt'}\n")
+        assert b["text"].startswith(f"File: {tmp_path / 'b' / 'notes.txt'}\n")
+
+    def test_uploaded_file_is_uploaded_once(self, tmp_path):
+        path = tmp_path / "doc.pdf"
+        path.write_bytes(b"%PDF-1.4")
+        uploads = []
+
+        def create(file, purpose):
+            uploads.append((file, purpose))
+            return SimpleNamespace(id="file-1")
+
+        client = SimpleNamespace(files=SimpleNamespace(create=create))
+        attachments = Attachments(max_image_bytes=1000, client=client, upload=True)
+
+        first = attachments.get_content_part(str(path))
+        second = attachments.get_content_part(str(path))
+
+        assert first == second == dict(type="file", file=dict(file_id="file-1"))
+        assert uploads == [
+            (("doc.pdf", b"%PDF-1.4", "application/pdf"), "user_data"),
+        ]
+
+    def test_missing_file_raises(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            Attachments(max_image_bytes=1000).get_content_part(
+                str(tmp_path / "missing.txt")
+            )
+
+    def test_build_user_message_without_paths_is_plain_text(self):
+        message = Attachments(max_image_bytes=1000).build_user_message("hi", [])
+
+        assert message == dict(role="user", content="hi")
+
+    def test_build_user_message_with_paths(self, tmp_path):
+        path = tmp_path / "notes.txt"
+        path.write_text("hello")
+
+        message = Attachments(max_image_bytes=1000).build_user_message(
+            "hi", [str(path)]
+        )
+
+        assert message["content"][0] == dict(type="text", text="hi")
+        assert "hello" in message["content"][1]["text"]
+        assert get_content_text(message["content"]).startswith("hi\n")
+
+
+class TestParseAttachCommands:
+    def test_no_commands(self):
+        assert parse_attach_commands("hello\nworld") == ("hello\nworld", [])
+
+    def test_removes_command_lines(self):
+        text = "/attach a.png 'b c.pdf'\nhello\n/attach d.txt"
+
+        assert parse_attach_commands(text) == ("hello", ["a.png", "b c.pdf", "d.txt"])
+
+    def test_command_must_start_the_line(self):
+        text = "see /attach a.png"
+
+        assert parse_attach_commands(text) == (text, [])
+
+
+class TestShrinkImage:
+    @pytest.fixture
+    def Image(self):
+        return pytest.importorskip("PIL.Image")
+
+    def make_png(self, Image, size: int) -> bytes:
+        image = Image.frombytes("RGB", (size, size), os.urandom(size * size * 3))
+        buffer = BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def test_small_image_is_unchanged(self, Image):
+        data = self.make_png(Image, 8)
+
+        assert shrink_image(data, "image/png", len(data)) == (data, "image/png")
+
+    def test_large_image_is_shrunk_to_fit(self, Image):
+        data = self.make_png(Image, 512)
+        max_bytes = len(data) // 10
+
+        shrunk, mime_type = shrink_image(data, "image/png", max_bytes)
+
+        assert mime_type == "image/jpeg"
+        assert len(shrunk) <= max_bytes
+        assert Image.open(BytesIO(shrunk)).format == "JPEG"
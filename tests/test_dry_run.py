@@ -0,0 +1,96 @@
+import sys
+
+import pytest
+
+from llm_cli.args import parse_args
+from llm_cli.dry_run import (
+    MODEL_PROFILES,
+    PROMPT_CACHE_INCREMENT,
+    PROMPT_CACHE_MIN_TOKENS,
+    ModelProfile,
+    dry_run,
+    get_cacheable_prefix_tokens,
+    get_cost,
+    get_model_profile,
+)
+
+
+class TestGetModelProfile:
+    def test_exact_match(self):
+        assert get_model_profile("gpt-4o") is MODEL_PROFILES["gpt-4o"]
+
+    def test_longest_prefix_wins(self):
+        assert (
+            get_model_profile("gpt-5-mini-2025-08-07") is MODEL_PROFILES["gpt-5-mini"]
+        )
+        assert get_model_profile("gpt-4o-mini") is MODEL_PROFILES["gpt-4o-mini"]
+
+    def test_shorter_prefix_used_for_unknown_variant(self):
+        assert get_model_profile("gpt-5.1") is MODEL_PROFILES["gpt-5"]
+
+    def test_unknown_model(self):
+        assert get_model_profile("llama-3") is None
+
+
+class TestGetCacheablePrefixTokens:
+    def messages(self, *roles):
+        return [dict(role=role, content="") for role in roles]
+
+    def test_short_prefix_is_not_cached(self):
+        messages = self.messages("system", "user")
+
+        assert get_cacheable_prefix_tokens(messages, [1000, 5000]) == 0
+
+    def test_prefix_is_rounded_down_to_increments(self):
+        messages = self.messages("system", "user")
+
+        assert get_cacheable_prefix_tokens(
+            messages, [PROMPT_CACHE_MIN_TOKENS + PROMPT_CACHE_INCREMENT + 100, 10]
+        ) == (PROMPT_CACHE_MIN_TOKENS + PROMPT_CACHE_INCREMENT)
+
+    def test_only_messages_before_last_user_message_count(self):
+        messages = self.messages("system", "user", "assistant", "user")
+
+        assert get_cacheable_prefix_tokens(messages, [500, 300, 300, 5000]) == 1024
+
+    def test_without_user_message_all_messages_count(self):
+        messages = self.messages("system")
+
+        assert get_cacheable_prefix_tokens(messages, [2000]) == (
+            PROMPT_CACHE_MIN_TOKENS + 7 * PROMPT_CACHE_INCREMENT
+        )
+
+
+def test_get_cost():
+    profile = ModelProfile(
+        context_window=1000,
+        input_price=2.0,
+        cached_input_price=0.5,
+        output_price=8.0,
+        first_token_latency=0,
+        input_tokens_per_second=1,
+        output_tokens_per_second=1,
+    )
+
+    assert get_cost(profile, 1_000_000, 0, 0) == pytest.approx(2.0)
+    assert get_cost(profile, 1_000_000, 400_000, 0) == pytest.approx(1.4)
+    assert get_cost(profile, 0, 0, 500_000) == pytest.approx(4.0)
+
+
+def test_dry_run(monkeypatch, capsys, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["llm", "--dry-run", "--model", "gpt-5", "--prompt", "Be brief.", "hello"],
+    )
+
+    dry_run(parse_args())
+
+    out = capsys.readouterr().out
+    assert '"model": "gpt-5"' in out
+    assert "[0] system: " in out
+    assert "[1] user: " in out
+    assert "Cacheable prefix" in out
+    assert "(fits)" in out
+    assert "Projected latency:" in out
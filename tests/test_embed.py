@@ -0,0 +1,257 @@
+import argparse
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from llm_cli import embed
+from llm_cli.args import parse_args
+from llm_cli.embed import embed_search, make_batches
+from llm_cli.tokens import estimate_tokens
+
+
+class TestMakeBatches:
+    def test_no_limits_hit_yields_one_batch(self):
+        texts = ["a", "b", "c"]
+        assert list(make_batches(texts, max_tokens=100, max_items=100)) == [slice(0, 3)]
+
+    def test_splits_on_max_items(self):
+        texts = ["a"] * 5
+        assert list(make_batches(texts, max_tokens=100, max_items=2)) == [
+            slice(0, 2),
+            slice(2, 4),
+            slice(4, 5),
+        ]
+
+    def test_splits_on_max_tokens(self):
+        texts = ["hello world"] * 5
+        tokens = estimate_tokens(texts[0])
+
+        batches = list(make_batches(texts, max_tokens=2 * tokens, max_items=100))
+
+        assert batches == [slice(0, 2), slice(2, 4), slice(4, 5)]
+
+    def test_text_over_token_limit_gets_own_batch(self):
+        texts = ["a", "word " * 100, "b"]
+        assert list(make_batches(texts, max_tokens=10, max_items=100)) == [
+            slice(0, 1),
+            slice(1, 2),
+            slice(2, 3),
+        ]
+
+    def test_batches_cover_all_texts_in_order(self):
+        texts = [f"text {i} " * (i % 7 + 1) for i in range(100)]
+
+        batches = list(make_batches(texts, max_tokens=20, max_items=5))
+
+        assert [i for batch in batches for i in range(len(texts))[batch]] == list(
+            range(len(texts))
+        )
+        for batch in batches:
+            assert batch.stop - batch.start <= 5
+
+
+class TestEmbedArgs:
+    def parse(self, monkeypatch, *argv: str) -> argparse.Namespace:
+        monkeypatch.setattr(sys, "argv", ["llm", *argv])
+        return parse_args()
+
+    def test_embed(self, monkeypatch):
+        args = self.parse(monkeypatch, "--embed", "a.txt", "-o", "v.npy")
+
+        assert args.command == "embed"
+        assert args.files == ["a.txt"]
+
+    def test_embed_search(self, monkeypatch):
+        args = self.parse(monkeypatch, "--embed-search", "v.npy", "reset", "password")
+
+        assert args.command == "embed-search"
+        assert args.query == ["reset", "password"]
+
+    def test_profiling_args_may_come_first(self, monkeypatch):
+        args = self.parse(
+            monkeypatch,
+            "--profile",
+            "--profile-output",
+            "out.prof",
+            "--embed",
+            "a.txt",
+            "-o",
+            "v.npy",
+        )
+
+        assert args.command == "embed"
+        assert args.profile
+        assert args.profile_output == "out.prof"
+
+    def test_prompt_starting_with_embed_is_a_message(self, monkeypatch):
+        args = self.parse(monkeypatch, "embed", "this")
+
+        assert args.command is None
+        assert args.message == "embed this"
+
+    def test_mode_flag_after_other_args_is_rejected(self, monkeypatch):
+        with pytest.raises(SystemExit):
+            self.parse(monkeypatch, "--model", "gpt-5", "--embed", "a.txt")
+
+    @pytest.mark.parametrize(
+        "arg", ["--batch-tokens", "--batch-items", "--concurrency"]
+    )
+    def test_batch_args_must_be_positive(self, monkeypatch, arg):
+        with pytest.raises(SystemExit):
+            self.parse(monkeypatch, "--embed", "a.txt", "-o", "v.npy", arg, "0")
+
+    def test_top_k_must_be_positive(self, monkeypatch):
+        with pytest.raises(SystemExit):
+            self.parse(monkeypatch, "--embed-search", "v.npy", "query", "-n", "0")
+
+
+class TestEmbed:
+    @pytest.fixture
+    def np(self):
+        return pytest.importorskip("numpy")
+
+    def make_args(self, tmp_path, texts) -> argparse.Namespace:
+        path = tmp_path / "texts.txt"
+        path.write_text("".join(f"{text}\n" for text in texts))
+
+        return argparse.Namespace(
+            files=[str(path)],
+            whole_files=False,
+            output=str(tmp_path / "vectors.npy"),
+            model="model",
+            dimensions=None,
+            batch_tokens=1000,
+            batch_items=1,
+            concurrency=1,
+        )
+
+    def make_client(self, fail_on_call=None, latency=0.0):
+        calls = []
+
+        def create(input, **kwargs):
+            calls.append(input)
+            time.sleep(latency)
+            if len(calls) == fail_on_call:
+                raise RuntimeError("API error")
+
+            return SimpleNamespace(
+                data=[
+                    SimpleNamespace(index=i, embedding=[float(len(text)), 1.0])
+                    for i, text in enumerate(input)
+                ]
+            )
+
+        return SimpleNamespace(embeddings=SimpleNamespace(create=create)), calls
+
+    def test_writes_vectors_and_ids(self, np, tmp_path):
+        args = self.make_args(tmp_path, ["a", "bb", "ccc"])
+        client, calls = self.make_client()
+
+        embed.embed(args, client)
+
+        assert len(calls) == 3
+        assert np.load(args.output).tolist() == [[1, 1], [2, 1], [3, 1]]
+        assert (tmp_path / "vectors.ids.txt").read_text().splitlines() == [
+            f"{args.files[0]}:{i}" for i in (1, 2, 3)
+        ]
+
+    def test_failed_batch_cancels_remaining_batches(self, np, tmp_path):
+        args = self.make_args(tmp_path, [f"text {i}" for i in range(20)])
+        client, calls = self.make_client(fail_on_call=2, latency=0.1)
+
+        with pytest.raises(RuntimeError):
+            embed.embed(args, client)
+
+        # At most one more batch was already running when the error was seen
+        assert len(calls) <= 3
+        assert not (tmp_path / "vectors.npy").exists()
+        assert not (tmp_path / "vectors.ids.txt").exists()
+
+    def test_failed_first_batch_keeps_existing_output(self, np, tmp_path):
+        args = self.make_args(tmp_path, ["a", "b"])
+        (tmp_path / "vectors.npy").write_bytes(b"old")
+        client, _ = self.make_client(fail_on_call=1)
+
+        with pytest.raises(RuntimeError):
+            embed.embed(args, client)
+
+        assert (tmp_path / "vectors.npy").read_bytes() == b"old"
+
+
+class TestEmbedSearch:
+    @pytest.fixture
+    def np(self):
+        return pytest.importorskip("numpy")
+
+    @pytest.fixture(autouse=True)
+    def small_blocks(self, monkeypatch):
+        monkeypatch.setattr(embed, "SEARCH_BLOCK_SIZE", 7)
+
+    def search(self, np, tmp_path, capsys, vectors, query, top_k, ids=None):
+        vectors_path = tmp_path / "vectors.npy"
+        np.save(vectors_path, vectors.astype(np.float32))
+        if ids is not None:
+            (tmp_path / "vectors.ids.txt").write_text("".join(f"{i}\n" for i in ids))
+
+        client = SimpleNamespace(
+            embeddings=SimpleNamespace(
+                create=lambda **kwargs: SimpleNamespace(
+                    data=[SimpleNamespace(index=0, embedding=query.tolist())]
+                )
+            )
+        )
+        args = argparse.Namespace(
+            vectors=str(vectors_path),
+            query=["query"],
+            top_k=top_k,
+            model="model",
+            dimensions=None,
+        )
+
+        embed_search(args, client)
+
+        lines = capsys.readouterr().out.splitlines()
+        return [(float(score), id_) for score, id_ in (l.split("\t") for l in lines)]
+
+    def test_matches_brute_force_across_blocks(self, np, tmp_path, capsys):
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(50, 8))
+        query = rng.normal(size=8)
+
+        results = self.search(np, tmp_path, capsys, vectors, query, top_k=5)
+
+        scores = (vectors @ query) / (
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+        )
+        expected = np.argsort(-scores)[:5]
+        assert [int(id_) for _, id_ in results] == expected.tolist()
+        assert [score for score, _ in results] == pytest.approx(
+            scores[expected].tolist(), abs=1e-4
+        )
+
+    def test_top_k_larger_than_vectors_returns_all(self, np, tmp_path, capsys):
+        vectors = np.eye(3)
+        query = np.array([0.0, 1.0, 0.0])
+
+        results = self.search(np, tmp_path, capsys, vectors, query, top_k=10)
+
+        assert [id_ for _, id_ in results] == ["1", "0", "2"]
+
+    def test_prints_ids_from_sidecar_file(self, np, tmp_path, capsys):
+        vectors = np.eye(3)
+        query = np.array([0.0, 0.0, 1.0])
+        ids = ["a.txt:1", "a.txt:2", "b.txt:1"]
+
+        results = self.search(np, tmp_path, capsys, vectors, query, top_k=1, ids=ids)
+
+        assert results == [(pytest.approx(1.0), "b.txt:1")]
+
+    def test_zero_vectors_do_not_produce_nan(self, np, tmp_path, capsys):
+        vectors = np.array([[0.0, 0.0], [1.0, 0.0]])
+        query = np.array([1.0, 0.0])
+
+        results = self.search(np, tmp_path, capsys, vectors, query, top_k=2)
+
+        assert results == [(pytest.approx(1.0), "1"), (pytest.approx(0.0), "0")]
@@ -0,0 +1,200 @@
+import io
+
+import pytest
+
+from llm_cli.markdown import (
+    CodeHighlighter,
+    MarkdownRenderer,
+    bold,
+    dim,
+    render_table,
+    underline,
+)
+
+TABLE = "| a | b |\n|---|---|\n| 1 | 2 |\n"
+
+
+@pytest.fixture(autouse=True)
+def terminal_size(monkeypatch):
+    monkeypatch.setenv("COLUMNS", "80")
+    monkeypatch.setenv("LINES", "24")
+
+
+@pytest.fixture
+def out():
+    return io.StringIO()
+
+
+@pytest.fixture
+def renderer(out):
+    return MarkdownRenderer(out)
+
+
+class TestMarkdownRenderer:
+    def test_partial_line_is_written_raw(self, renderer, out):
+        renderer.write("# Hel")
+
+        assert out.getvalue() == "# Hel"
+
+    def test_completed_line_erases_tail_and_is_rendered(self, renderer, out):
+        renderer.write("# Hel")
+        renderer.write("lo\nmore")
+
+        assert out.getvalue() == (
+            "# Hel" + "\r\033[J" + underline(bold("Hello")) + "\n" + "more"
+        )
+        assert renderer.tail == "more"
+
+    def test_only_the_open_tail_is_erased(self, renderer, out):
+        renderer.write("one\ntw")
+        out.truncate(0)
+        out.seek(0)
+
+        renderer.write("o\n")
+
+        assert out.getvalue() == "\r\033[J" + "two\n"
+
+    def test_wrapped_tail_is_erased_across_rows(self, monkeypatch, renderer, out):
+        monkeypatch.setenv("COLUMNS", "10")
+        renderer.write("x" * 25)
+        out.truncate(0)
+        out.seek(0)
+
+        renderer.write("\n")
+
+        assert out.getvalue() == "\r\033[2A\033[J" + "x" * 25 + "\n"
+
+    def test_table_is_held_raw_until_it_ends(self, renderer, out):
+        renderer.write(TABLE)
+
+        assert out.getvalue() == TABLE
+        assert renderer.in_table
+        assert renderer.tail == TABLE
+
+    def test_table_is_rendered_when_it_ends(self, renderer, out):
+        renderer.write(TABLE)
+        renderer.write("after\n")
+
+        assert out.getvalue() == (
+            TABLE + "\r\033[3A\033[J" + render_table(TABLE) + "after\n"
+        )
+        assert not renderer.in_table
+        assert renderer.tail == ""
+
+    def test_table_is_rendered_on_finish(self, renderer, out):
+        renderer.write(TABLE.rstrip("\n"))
+        renderer.finish()
+
+        assert out.getvalue().endswith("\r\033[3A\033[J" + render_table(TABLE))
+        assert not renderer.in_table
+        assert renderer.tail == ""
+
+    def test_table_row_inside_code_block_is_not_a_table(self, renderer, out):
+        renderer.write("```\n| a |\n```\n")
+
+        assert not renderer.in_table
+        assert renderer.tail == ""
+
+    def test_tail_too_tall_to_erase_is_left_raw(self, monkeypatch, renderer, out):
+        monkeypatch.setenv("LINES", "3")
+        renderer.write(TABLE)
+        renderer.write("after\n")
+
+        assert out.getvalue() == TABLE + "after\n"
+        assert not renderer.in_table
+        assert renderer.tail == ""
+
+    def test_code_block_fences_are_dimmed(self, renderer, out):
+        renderer.write("```\ncode\n```\n")
+
+        assert out.getvalue().endswith(dim("```") + "\n")
+        assert renderer.fence is None
+
+
+class TestCodeHighlighter:
+    def highlight_lines(self, language, lines) -> list[str]:
+        highlighter = CodeHighlighter(language)
+        return [highlighter.highlight(line) for line in lines]
+
+    def test_unknown_language_returns_lines_unchanged(self):
+        highlighter = CodeHighlighter("not-a-language")
+
+        assert highlighter.highlight("x = 1") == "x = 1"
+
+    def test_highlights_line(self):
+        [highlighted] = self.highlight_lines("python", ["x = 1  # one"])
+
+        assert highlighted != "x = 1  # one"
+        assert "\033[" in highlighted
+
+    def test_continues_multi_line_docstring(self):
+        highlighted = self.highlight_lines(
+            "python", ["def f():", '    """', "    doc line", "    more", '    """']
+        )
+
+        assert CodeHighlighter("python").highlight("    doc line") == "    doc line"
+        assert highlighted[2] != "    doc line"
+        assert highlighted[3] == highlighted[2].replace("doc line", "more")
+
+    def test_continues_multi_line_comment(self):
+        highlighted = self.highlight_lines("c", ["/* start", "int x;", "end */"])
+
+        assert highlighted[1] != CodeHighlighter("c").highlight("int x;")
+
+    def test_state_is_reset_after_multi_line_token_ends(self):
+        highlighter = CodeHighlighter("python")
+        for line in ['x = """', "doc", '"""']:
+            highlighter.highlight(line)
+
+        assert highlighter.context == []
+        assert highlighter.highlight("y = 1") == CodeHighlighter("python").highlight(
+            "y = 1"
+        )
+
+    def test_context_excludes_lines_inside_the_token(self):
+        highlighter = CodeHighlighter("python")
+        for line in ['x = """', *["doc"] * 100]:
+            highlighter.highlight(line)
+
+        assert highlighter.context == ['x = """']
+
+    def test_renderer_highlights_docstring_lines(self, renderer, out):
+        expected = self.highlight_lines(
+            "python", ["def f():", '    """', "    doc line"]
+        )[-1]
+
+        renderer.write('```python\ndef f():\n    """\n    doc line\n    """\n```\n')
+
+        assert expected + "\n" in out.getvalue()
+        assert renderer.code_highlighter is None
+
+    @pytest.mark.parametrize(
+        "language, body",
+        [
+            ("python", "".join(f"x_{i} = {i}  # comment\n" for i in range(2000))),
+            ("python", 'def f():\n    """\n' + "    doc line\n" * 2000 + '    """\n'),
+            ("c", "/* start\n" + "comment line\n" * 2000 + "*/\n"),
+        ],
+        ids=["code", "docstring", "comment"],
+    )
+    def test_long_code_block_is_lexed_in_linear_time(
+        self, monkeypatch, renderer, language, body
+    ):
+        from pygments.lexer import Lexer
+
+        lexed_chars = 0
+        get_tokens = Lexer.get_tokens
+
+        def counting_get_tokens(self, text, *args, **kwargs):
+            nonlocal lexed_chars
+            lexed_chars += len(text)
+            return get_tokens(self, text, *args, **kwargs)
+
+        monkeypatch.setattr(Lexer, "get_tokens", counting_get_tokens)
+
+        text = f"```{language}\n" + body + "```\n"
+        for i in range(0, len(text), 8):
+            renderer.write(text[i : i + 8])
+        renderer.finish()
+
+        assert lexed_chars <= 2 * len(body)
@@ -0,0 +1,185 @@
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from llm_cli.args import parse_args
+from llm_cli.cli import create_client
+from llm_cli.responses import get_assistant_response_responses_api
+
+
+class StubResponsesServer(ThreadingHTTPServer):
+    """
+    Serves the Responses API, recording each request body. Each response
+    echoes the number of the request it answers, and is incomplete if the
+    request sets max_output_tokens.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubResponsesHandler)
+        self.requests = []
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class StubResponsesHandler(BaseHTTPRequestHandler):
+    server: StubResponsesServer
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+
+        number = len(self.server.requests)
+        text = f"Reply {number}"
+        response = dict(
+            id=f"resp_{number}",
+            object="response",
+            created_at=0,
+            model=body["model"],
+            status="completed",
+            output=[
+                dict(
+                    id=f"msg_{number}",
+                    type="message",
+                    role="assistant",
+                    status="completed",
+                    content=[dict(type="output_text", text=text, annotations=[])],
+                )
+            ],
+            parallel_tool_calls=True,
+            tool_choice="auto",
+            tools=[],
+        )
+
+        if body.get("max_output_tokens"):
+            response["status"] = "incomplete"
+            response["incomplete_details"] = dict(reason="max_output_tokens")
+
+        if body.get("stream"):
+            self.send_stream(text, response)
+        else:
+            self.send_body("application/json", json.dumps(response).encode())
+
+    def send_stream(self, text: str, response: dict) -> None:
+        end_type = f"response.{response['status']}"
+        events = [
+            dict(type="response.output_text.delta", delta=text),
+            dict(type=end_type, response=response),
+        ]
+
+        self.send_body(
+            "text/event-stream",
+            "".join(
+                f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                for event in events
+            ).encode(),
+        )
+
+    def send_body(self, content_type: str, body: bytes) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = StubResponsesServer()
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs=dict(poll_interval=0.01), daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_args(monkeypatch, server: StubResponsesServer, *extra_args: str):
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "llm",
+            "--responses-api",
+            "--base-url",
+            server.base_url,
+            "--api-key",
+            "test",
+            "--prompt",
+            "Be brief.",
+            *extra_args,
+        ],
+    )
+    return parse_args()
+
+
+@pytest.mark.parametrize("stream", [True, False])
+def test_multi_turn_with_undo_sends_only_new_input(monkeypatch, server, stream):
+    args = make_args(monkeypatch, server, *([] if stream else ["--no-stream"]))
+    client = create_client(args)
+
+    def send(messages: list, text: str) -> None:
+        messages.append(dict(role="user", content=text))
+        messages.append(
+            get_assistant_response_responses_api(
+                args, client, messages, use_spinner=False
+            )
+        )
+
+    messages = [dict(role="system", content=args.prompt)]
+    send(messages, "one")
+    send(messages, "two")
+
+    # Undo the last exchange, then continue from the first response
+    del messages[-2:]
+    send(messages, "three")
+
+    assert [r["input"] for r in server.requests] == [
+        [dict(role="user", content="one")],
+        [dict(role="user", content="two")],
+        [dict(role="user", content="three")],
+    ]
+    assert [r.get("previous_response_id") for r in server.requests] == [
+        None,
+        "resp_1",
+        "resp_1",
+    ]
+    assert all(r["instructions"] == "Be brief." for r in server.requests)
+    assert all(r["store"] for r in server.requests)
+
+    assert messages[-1] == dict(
+        role="assistant", content="Reply 3", response_id="resp_3"
+    )
+
+
+@pytest.mark.parametrize("stream", [True, False])
+def test_incomplete_response_is_noted(monkeypatch, capsys, server, stream):
+    args = make_args(
+        monkeypatch,
+        server,
+        "--max-tokens",
+        "1",
+        *([] if stream else ["--no-stream"]),
+    )
+    client = create_client(args)
+
+    message = get_assistant_response_responses_api(
+        args, client, [dict(role="user", content="hi")], use_spinner=False
+    )
+
+    assert message == dict(role="assistant", content="Reply 1", response_id="resp_1")
+    assert "[Incomplete: max_output_tokens]" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("traffic_arg", ["--record", "--replay"])
+def test_traffic_args_are_rejected(monkeypatch, server, traffic_arg):
+    with pytest.raises(ValueError, match="--responses-api"):
+        make_args(monkeypatch, server, traffic_arg, "traffic.jsonl")
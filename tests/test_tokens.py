@@ -0,0 +1,171 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from openai import omit
+
+from llm_cli import tokens
+from llm_cli.tokens import (
+    TOKENS_PER_IMAGE,
+    TOKENS_PER_MESSAGE,
+    TOKENS_PER_REPLY,
+    estimate_message_tokens,
+    estimate_messages_tokens,
+    estimate_tokens,
+    get_calibration_path,
+    get_calibration_ratio,
+    load_calibration,
+    record_token_usage,
+    save_calibration,
+)
+
+
+@pytest.fixture(autouse=True)
+def cache_home(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    return tmp_path
+
+
+class TestEstimateTokens:
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ("", 0),
+            ("hello", 1),
+            ("hello world", 2),
+            ("internationalization", 4),
+            ("123", 1),
+            ("1234567", 3),
+            ("a, b!", 4),
+            ("...", 2),
+            ("one two", 2),
+            ("one  two", 3),
+            ("one\ntwo", 3),
+            ("é", 1),
+            ("日本", 2),
+        ],
+    )
+    def test_estimate(self, text, expected):
+        assert estimate_tokens(text) == expected
+
+    def test_string_message(self):
+        message = dict(role="user", content="hello world")
+
+        assert estimate_message_tokens(message) == TOKENS_PER_MESSAGE + 2
+
+    def test_content_parts_message(self):
+        message = dict(
+            role="user",
+            content=[
+                dict(type="text", text="hello world"),
+                dict(type="image_url", image_url=dict(url="data:...")),
+                dict(type="file", file=dict(file_id="file-1")),
+            ],
+        )
+
+        assert estimate_message_tokens(message) == (
+            TOKENS_PER_MESSAGE + 2 + TOKENS_PER_IMAGE
+        )
+
+    def test_messages(self):
+        messages = [
+            dict(role="system", content="hello"),
+            dict(role="user", content="hello world"),
+        ]
+
+        assert estimate_messages_tokens(messages) == (
+            TOKENS_PER_REPLY + 2 * TOKENS_PER_MESSAGE + 3
+        )
+
+
+class TestCalibration:
+    def make_request_kwargs(self, model="gpt-5", content="hello world", **kwargs):
+        return dict(
+            model=model,
+            messages=[dict(role="user", content=content)],
+            response_format=omit,
+            **kwargs,
+        )
+
+    def estimated_tokens(self, request_kwargs) -> int:
+        return estimate_messages_tokens(request_kwargs["messages"])
+
+    def test_default_ratio(self):
+        assert load_calibration() == {}
+        assert get_calibration_ratio("gpt-5") == 1.0
+
+    def test_first_sample_sets_ratio(self):
+        request_kwargs = self.make_request_kwargs()
+        estimated = self.estimated_tokens(request_kwargs)
+
+        record_token_usage(request_kwargs, SimpleNamespace(prompt_tokens=2 * estimated))
+
+        assert load_calibration() == {"gpt-5": dict(ratio=2.0, samples=1)}
+        assert get_calibration_ratio("gpt-5") == 2.0
+        assert get_calibration_ratio("gpt-4o") == 1.0
+
+    def test_later_samples_are_smoothed(self):
+        request_kwargs = self.make_request_kwargs()
+        estimated = self.estimated_tokens(request_kwargs)
+
+        record_token_usage(request_kwargs, SimpleNamespace(prompt_tokens=2 * estimated))
+        record_token_usage(request_kwargs, SimpleNamespace(prompt_tokens=estimated))
+
+        calibration = load_calibration()["gpt-5"]
+        assert calibration["ratio"] == pytest.approx(
+            2.0 + tokens.CALIBRATION_SMOOTHING * (1.0 - 2.0)
+        )
+        assert calibration["samples"] == 2
+
+    def test_attachments_are_not_calibrated(self):
+        request_kwargs = self.make_request_kwargs(
+            content=[dict(type="text", text="hello")]
+        )
+
+        record_token_usage(request_kwargs, SimpleNamespace(prompt_tokens=1000))
+
+        assert not get_calibration_path().exists()
+
+    def test_response_format_is_not_calibrated(self):
+        request_kwargs = self.make_request_kwargs()
+        request_kwargs["response_format"] = dict(type="json_object")
+
+        record_token_usage(request_kwargs, SimpleNamespace(prompt_tokens=1000))
+
+        assert not get_calibration_path().exists()
+
+    def test_missing_usage_is_not_calibrated(self):
+        record_token_usage(
+            self.make_request_kwargs(), SimpleNamespace(prompt_tokens=None)
+        )
+
+        assert not get_calibration_path().exists()
+
+    def test_corrupt_file_is_ignored(self):
+        path = get_calibration_path()
+        path.parent.mkdir(parents=True)
+        path.write_text("{not json")
+
+        assert load_calibration() == {}
+        assert get_calibration_ratio("gpt-5") == 1.0
+
+    def test_save_replaces_file_atomically(self):
+        save_calibration({"a": dict(ratio=1.5, samples=1)})
+        save_calibration({"b": dict(ratio=0.5, samples=2)})
+
+        path = get_calibration_path()
+        assert json.loads(path.read_text()) == {"b": dict(ratio=0.5, samples=2)}
+        assert list(path.parent.iterdir()) == [path]
+
+    def test_failed_replace_keeps_old_file(self, monkeypatch):
+        save_calibration({"a": dict(ratio=1.5, samples=1)})
+
+        def fail_replace(src, dst):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(tokens.os, "replace", fail_replace)
+        save_calibration({"b": dict(ratio=0.5, samples=2)})
+
+        path = get_calibration_path()
+        assert json.loads(path.read_text()) == {"a": dict(ratio=1.5, samples=1)}
+        assert list(path.parent.iterdir()) == [path]
@@ -0,0 +1,249 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from openai import BadRequestError, OpenAIError
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from llm_cli import traffic
+from llm_cli.traffic import (
+    ReplayClient,
+    load_exchanges,
+    optional_recording,
+    print_latency_histogram,
+)
+from llm_cli.utils import error_is_streaming_not_supported
+
+COMPLETION = ChatCompletion.model_validate(
+    dict(
+        id="chatcmpl-1",
+        object="chat.completion",
+        created=0,
+        model="gpt-5",
+        choices=[
+            dict(
+                index=0,
+                finish_reason="stop",
+                message=dict(role="assistant", content="Hello"),
+            )
+        ],
+    )
+)
+
+
+def make_chunk(**delta) -> ChatCompletionChunk:
+    return ChatCompletionChunk.model_validate(
+        dict(
+            id="chatcmpl-2",
+            object="chat.completion.chunk",
+            created=0,
+            model="gpt-5",
+            choices=[dict(index=0, delta=delta)],
+        )
+    )
+
+
+CHUNKS = [
+    make_chunk(role="assistant"),
+    make_chunk(content="Hel"),
+    make_chunk(content="lo"),
+]
+
+STREAMING_NOT_SUPPORTED = BadRequestError(
+    "Streaming is not supported",
+    response=SimpleNamespace(request=None, status_code=400, headers={}),
+    body=dict(
+        message="Streaming is not supported",
+        type="invalid_request_error",
+        param="stream",
+        code=None,
+    ),
+)
+
+
+def make_client(*results):
+    """
+    Make a fake client that returns (or raises) the results in order.
+    Lists of chunks are returned as streams.
+    """
+
+    results = list(results)
+
+    def create(**kwargs):
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        if isinstance(result, list):
+            return stream(result)
+        return result
+
+    def stream(items):
+        for item in items:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    return SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+
+
+def record(path, client, requests) -> list:
+    """Send the requests through a recording client, returning the results."""
+    results = []
+    with optional_recording(client, str(path)) as recording_client:
+        for kwargs in requests:
+            try:
+                result = recording_client.chat.completions.create(**kwargs)
+                if kwargs.get("stream"):
+                    result = list(result)
+            except OpenAIError as e:
+                result = e
+            results.append(result)
+
+    return results
+
+
+def dump(result):
+    if isinstance(result, list):
+        return [chunk.model_dump() for chunk in result]
+    return result.model_dump()
+
+
+@pytest.mark.parametrize("filename", ["traffic.jsonl", "traffic.jsonl.gz"])
+def test_record_replay_round_trip(tmp_path, filename):
+    path = tmp_path / filename
+    requests = [
+        dict(model="gpt-5", messages=[dict(role="user", content="hi")]),
+        dict(model="gpt-5", messages=[dict(role="user", content="hi")], stream=True),
+    ]
+
+    recorded = record(path, make_client(COMPLETION, CHUNKS), requests)
+
+    replay_client = ReplayClient(str(path), speed=0)
+    replayed = replay_client.chat.completions.create(**requests[0])
+    replayed_chunks = list(replay_client.chat.completions.create(**requests[1]))
+
+    assert dump(replayed) == dump(recorded[0]) == dump(COMPLETION)
+    assert dump(replayed_chunks) == dump(recorded[1]) == dump(CHUNKS)
+    assert [e.kwargs for e in load_exchanges(str(path))] == requests
+
+
+def test_replay_runs_out_of_responses(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    record(path, make_client(COMPLETION), [dict(model="gpt-5", messages=[])])
+
+    replay_client = ReplayClient(str(path), speed=0)
+    replay_client.chat.completions.create(model="gpt-5", messages=[])
+
+    with pytest.raises(OpenAIError, match="No more recorded responses"):
+        replay_client.chat.completions.create(model="gpt-5", messages=[])
+
+
+def test_replay_rejects_stream_mismatch(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    record(path, make_client(COMPLETION), [dict(model="gpt-5", messages=[])])
+
+    with pytest.raises(OpenAIError, match="stream=False"):
+        ReplayClient(str(path), speed=0).chat.completions.create(
+            model="gpt-5", messages=[], stream=True
+        )
+
+
+def test_request_error_is_recorded_and_replayed(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    requests = [
+        dict(model="gpt-5", messages=[], stream=True),
+        dict(model="gpt-5", messages=[]),
+    ]
+
+    recorded = record(path, make_client(STREAMING_NOT_SUPPORTED, COMPLETION), requests)
+    assert recorded[0] is STREAMING_NOT_SUPPORTED
+
+    replay_client = ReplayClient(str(path), speed=0)
+    with pytest.raises(BadRequestError) as exc_info:
+        replay_client.chat.completions.create(**requests[0])
+
+    error = exc_info.value
+    assert error.status_code == 400
+    assert error.body == STREAMING_NOT_SUPPORTED.body
+    assert str(error) == str(STREAMING_NOT_SUPPORTED)
+    assert error_is_streaming_not_supported(error)
+
+    # Later exchanges stay in step
+    assert dump(replay_client.chat.completions.create(**requests[1])) == dump(
+        COMPLETION
+    )
+
+
+def test_stream_error_is_recorded_and_replayed(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    request = dict(model="gpt-5", messages=[], stream=True)
+
+    with optional_recording(
+        make_client([CHUNKS[0], OpenAIError("Connection lost")]), str(path)
+    ) as recording_client:
+        stream = recording_client.chat.completions.create(**request)
+        assert next(stream) is CHUNKS[0]
+        with pytest.raises(OpenAIError):
+            next(stream)
+
+    stream = ReplayClient(str(path), speed=0).chat.completions.create(**request)
+    assert dump([next(stream)]) == dump([CHUNKS[0]])
+    with pytest.raises(OpenAIError, match="Connection lost"):
+        next(stream)
+
+
+def test_non_streaming_replay_keeps_timing(tmp_path, monkeypatch):
+    path = tmp_path / "traffic.jsonl"
+    path.write_text(
+        "".join(
+            json.dumps(record) + "\n"
+            for record in [
+                dict(type="request", time=0, kwargs=dict(model="gpt-5", messages=[])),
+                dict(type="response", t=0.5, data=COMPLETION.model_dump(mode="json")),
+            ]
+        )
+    )
+
+    sleeps = []
+    monkeypatch.setattr(traffic.time, "sleep", sleeps.append)
+
+    ReplayClient(str(path), speed=2).chat.completions.create(model="gpt-5", messages=[])
+
+    assert sleeps == [pytest.approx(0.25, abs=0.05)]
+
+
+def test_replay_of_request_without_response_raises(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    path.write_text(
+        json.dumps(dict(type="request", time=0, kwargs=dict(model="gpt-5"))) + "\n"
+    )
+
+    with pytest.raises(OpenAIError, match="no response"):
+        ReplayClient(str(path), speed=0).chat.completions.create(model="gpt-5")
+
+
+def test_print_latency_histogram(capsys):
+    latencies = [0.05] * 5 + [0.3] * 4 + [100.0]
+
+    print_latency_histogram("Latency", latencies)
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[1] == "Latency: p50=0.050s; p90=0.300s; p99=100.000s; max=100.000s"
+
+    counts = {
+        label.strip(): int(bar.split()[-1])
+        for label, bar in (line.split("|") for line in lines[2:])
+    }
+    assert counts["<= 0.1s"] == 5
+    assert counts["<= 0.5s"] == 4
+    assert counts["> 60s"] == 1
+    assert sum(counts.values()) == len(latencies)
+    assert lines[2].endswith("#" * traffic.HISTOGRAM_WIDTH + " 5")
+
+
+def test_print_latency_histogram_without_latencies(capsys):
+    print_latency_histogram("Latency", [])
+
+    assert capsys.readouterr().out == ""